@@ -1,6 +1,90 @@
 __version__ = "1.3.0"
 
-from .api import *
-from .exceptions import *
-from .objects import *
-from .cache import *
+import importlib
+from typing import TYPE_CHECKING
+
+# Public names are imported on first access, so importing the package stays cheap
+# and aiohttp is only loaded once the client is actually used.
+_LAZY_NAMES = {
+    "AmariClient": "api",
+    "AmariException": "exceptions",
+    "HTTPException": "exceptions",
+    "NotFound": "exceptions",
+    "InvalidToken": "exceptions",
+    "RatelimitException": "exceptions",
+    "AmariServerError": "exceptions",
+    "DeadlineExceeded": "exceptions",
+    "CacheError": "exceptions",
+    "User": "objects",
+    "Users": "objects",
+    "Leaderboard": "objects",
+    "RewardRole": "objects",
+    "Rewards": "objects",
+    "FrozenUsers": "objects",
+    "FrozenLeaderboard": "objects",
+    "FrozenRewards": "objects",
+    "CombinedUser": "objects",
+    "CombinedLeaderboard": "objects",
+    "BulkResult": "objects",
+    "CacheBackend": "cache",
+    "Cache": "cache",
+    "RawLeaderboardPolicy": "cache",
+    "export_leaderboard": "export",
+    "export_leaderboards": "export",
+    "load_leaderboard": "export",
+    "ExpHistory": "history",
+    "PayloadOffloader": "offload",
+    "RedisCache": "redis",
+    "TrafficRecorder": "traffic",
+    "ReplayReport": "traffic",
+    "MockAmariServer": "traffic",
+    "replay": "traffic",
+    "SyncAmariClient": "sync",
+    "CacheWarmer": "warmer",
+    "ClientStats": "stats",
+}
+_SUBMODULES = {
+    "api",
+    "cache",
+    "exceptions",
+    "export",
+    "history",
+    "objects",
+    "offload",
+    "redis",
+    "stats",
+    "sync",
+    "traffic",
+    "warmer",
+}
+
+__all__ = tuple(_LAZY_NAMES)
+
+if TYPE_CHECKING:
+    from .api import *
+    from .cache import *
+    from .exceptions import *
+    from .export import *
+    from .history import *
+    from .objects import *
+    from .offload import *
+    from .redis import *
+    from .stats import *
+    from .sync import *
+    from .traffic import *
+    from .warmer import *
+
+
+def __getattr__(name: str):
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    module = _LAZY_NAMES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *__all__, *_SUBMODULES})
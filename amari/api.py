@@ -1,24 +1,76 @@
 import asyncio
+import concurrent.futures
+import contextlib
+import contextvars
+import functools
 import logging
 import time
-from typing import Dict, List, Optional
+import weakref
+from collections import OrderedDict, deque
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
 import aiohttp
 
-from .cache import Cache
+from .cache import Cache, CacheBackend, RawLeaderboardPolicy
 from .exceptions import (
     AmariServerError,
+    DeadlineExceeded,
     HTTPException,
     InvalidToken,
     NotFound,
     RatelimitException,
 )
-from .objects import Leaderboard, Rewards, User, Users
+from .history import ExpHistory
+from .objects import (
+    BulkResult,
+    CombinedLeaderboard,
+    FrozenLeaderboard,
+    FrozenRewards,
+    FrozenUsers,
+    Leaderboard,
+    Rewards,
+    User,
+    Users,
+)
+from .offload import PayloadOffloader
+from .stats import ClientStats
+from .traffic import TrafficRecorder, _active_recorder, _recorded, _set_outcome
+from .warmer import CacheWarmer, _refreshing
 
 __all__ = ("AmariClient",)
 
+T = TypeVar("T")
+
 logger = logging.getLogger(__name__)
 
+# How many leaderboards the total member count is remembered for, for the leaderboard policy.
+_TOTAL_COUNTS_SIZE = 1024
+
+# The deadline of the current call, in event loop time, set by AmariClient.deadline.
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "_deadline", default=None
+)
+
+
+def _log_history_error(guild_id: int, future: concurrent.futures.Future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(
+            f"Failed to record the leaderboard of guild {guild_id}.", exc_info=future.exception()
+        )
+
 
 class AmariClient:
     """
@@ -33,6 +85,7 @@ class AmariClient:
 
     session: aiohttp.ClientSession
         The client session used to make requests to the Amari API.
+        Unless one is passed in, it is created on the first request, on the running event loop.
 
     max_requests: int
         The number of requests that can be made per second
@@ -40,11 +93,45 @@ class AmariClient:
     cache_ttl: int
         The time to live for cache entries, in seconds.
 
-    cache: Cache
+    cache: CacheBackend
         The cache instance used to store API responses.
 
     maxbytes: int
         The maximum total size of cached data in bytes.
+
+    cache_backend: Optional[CacheBackend]
+        The cache to use instead of an in-memory :class:`Cache`, for example a
+        :class:`RedisCache` shared by many processes. ``cache_ttl`` and ``maxbytes``
+        are ignored when it is set, and the client does not close it.
+
+    leaderboard_policy: Optional[RawLeaderboardPolicy]
+        When set, cached paginated leaderboard requests are sliced from a cached raw
+        leaderboard, and the policy decides when the raw leaderboard is fetched.
+
+    not_found_ttl: int
+        The time to live for cached :exc:`NotFound` responses, in seconds.
+
+    offloader: Optional[PayloadOffloader]
+        When set, large responses are decoded and turned into objects outside the event loop.
+
+    history: Optional[ExpHistory]
+        When set, every full regular leaderboard fetched is recorded in it. The client
+        does not close it.
+
+    recorder: Optional[TrafficRecorder]
+        When set, every fetch call is recorded in it, to be replayed with :func:`replay`.
+
+    timeout: Optional[float]
+        The default deadline for each request, in seconds, covering both the anti ratelimit
+        wait and the HTTP request. ``None`` means requests can wait indefinitely.
+
+    hedge_percentile: Optional[float]
+        When set, a GET request that has not answered within this percentile of the recent
+        latencies (for example ``0.95``) is sent a second time, and the first answer is used.
+        Hedged requests are only sent while a quarter of the ratelimit budget is left.
+
+    stats: ClientStats
+        Counters of the requests, timeouts and hedged requests made by the client.
     """
 
     BASE_URL = "https://amaribot.com/api/v1/"
@@ -66,8 +153,21 @@ class AmariClient:
         max_requests: int = 55,
         cache_ttl: int = 60,
         maxbytes: int = 25 * 1024 * 1024,  # 25 MiB
+        cache_backend: Optional[CacheBackend] = None,
+        leaderboard_policy: Optional[RawLeaderboardPolicy] = None,
+        not_found_ttl: int = 10,
+        offloader: Optional[PayloadOffloader] = None,
+        history: Optional[ExpHistory] = None,
+        recorder: Optional[TrafficRecorder] = None,
+        timeout: Optional[float] = None,
+        hedge_percentile: Optional[float] = None,
     ):
-        self.session = session or aiohttp.ClientSession()
+        self._session = session
+        self._owns_session = session is None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stale_sessions: List[
+            Tuple[aiohttp.ClientSession, Optional[asyncio.AbstractEventLoop]]
+        ] = []
         self._default_headers = {"Authorization": token}
 
         self.lock = asyncio.Lock()
@@ -79,7 +179,28 @@ class AmariClient:
 
         self.max_requests = max_requests
         self.request_period = 60
-        self.cache = Cache(ttl=cache_ttl, maxbytes=maxbytes)
+        if cache_backend is None:
+            cache_backend = Cache(ttl=cache_ttl, maxbytes=maxbytes)
+        self.cache: CacheBackend = cache_backend
+        self.not_found_ttl = not_found_ttl
+        self._inflight: Dict[Tuple, asyncio.Task] = {}
+        self.offloader = offloader
+        self._snapshots: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+        self.history = history
+        self.recorder = recorder
+
+        # Deadline and hedging section
+        self.timeout = timeout
+        self.hedge_percentile = hedge_percentile
+        self.stats = ClientStats()
+
+        # Paginated leaderboard section
+        self.leaderboard_policy = leaderboard_policy
+        # Both are ordered from the least to the most recently paged leaderboard.
+        self._page_requests: OrderedDict[Tuple[int, bool], List[float]] = OrderedDict()
+        self._total_counts: OrderedDict[Tuple[int, bool], Optional[int]] = OrderedDict()
+
+        self._warmer: Optional[CacheWarmer] = None
 
     async def __aenter__(self):
         return self
@@ -93,7 +214,60 @@ class AmariClient:
 
         This must be called once the client is no longer in use.
         """
-        await self.session.close()
+        if self._warmer is not None:
+            await self._warmer.stop()
+        for task in list(self._inflight.values()):
+            task.cancel()
+        if self._session is not None:
+            await self._session.close()
+        await self._close_stale_sessions()
+
+    @property
+    def warmer(self) -> CacheWarmer:
+        """The :class:`CacheWarmer` that keeps registered cache entries fresh."""
+        if self._warmer is None:
+            self._warmer = CacheWarmer(self)
+        return self._warmer
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._owns_session:
+            loop = asyncio.get_running_loop()
+            if self._session is None or self._session.closed or self._session_loop is not loop:
+                # Sessions are bound to the loop they were created on, so a client reused
+                # across event loops (for example with asyncio.run) gets a new session.
+                self._discard_session()
+                self._session = aiohttp.ClientSession()
+                self._session_loop = loop
+        return self._session
+
+    @session.setter
+    def session(self, session: aiohttp.ClientSession):
+        self._session = session
+        self._owns_session = False
+
+    def _discard_session(self):
+        # Closes an owned session left on another event loop. A loop running in another
+        # thread closes it itself. Otherwise the loop may never run again, so the session
+        # is closed by the next request, or by close(), instead.
+        session, loop = self._session, self._session_loop
+        if session is None or session.closed:
+            return
+        if loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+        else:
+            self._stale_sessions.append((session, loop))
+
+    async def _close_stale_sessions(self):
+        while self._stale_sessions:
+            session, loop = self._stale_sessions.pop()
+            if loop is None or loop.is_closed():
+                # Its connections went with its loop, so it can be closed from this one.
+                await session.close()
+            else:
+                # Its connections belong to its loop, which is not running, so that loop
+                # is run in another thread to close it.
+                await asyncio.to_thread(loop.run_until_complete, session.close())
 
     async def check_ratelimit(self):
         async with self.lock:
@@ -107,6 +281,63 @@ class AmariClient:
                 if len(self.requests) >= self.max_requests:
                     await self.wait_for_ratelimit_end()
 
+    @contextlib.contextmanager
+    def deadline(self, timeout: float) -> Iterator[None]:
+        """
+        Sets a deadline for every request made within the ``with`` block.
+
+        The deadline covers the anti ratelimit wait and the HTTP requests, and requests
+        that cannot complete in time raise :exc:`DeadlineExceeded`. Nested deadlines
+        cannot extend an outer one.
+
+        .. code:: py
+
+            with client.deadline(2.5):
+                leaderboard = await client.fetch_leaderboard(guild_id)
+
+        Parameters
+        ----------
+        timeout: float
+            The time allowed, in seconds.
+        """
+        deadline = asyncio.get_running_loop().time() + timeout
+        current = _deadline.get()
+        if current is not None:
+            deadline = min(deadline, current)
+        token = _deadline.set(deadline)
+        try:
+            yield
+        finally:
+            _deadline.reset(token)
+
+    def _get_deadline(self, timeout: Optional[float]) -> Optional[float]:
+        timeout = self.timeout if timeout is None else timeout
+        deadline = _deadline.get()
+        if timeout is not None:
+            call_deadline = asyncio.get_running_loop().time() + timeout
+            deadline = call_deadline if deadline is None else min(deadline, call_deadline)
+        return deadline
+
+    @staticmethod
+    async def _until(awaitable: Awaitable[T], deadline: Optional[float]) -> T:
+        if deadline is None:
+            return await awaitable
+        remaining = deadline - asyncio.get_running_loop().time()
+        return await asyncio.wait_for(awaitable, max(remaining, 0))
+
+    def remaining_requests(self) -> int:
+        """
+        The number of requests that can be made before the anti ratelimit waits.
+
+        Returns
+        -------
+        int
+            The remaining requests in the current ratelimit period.
+        """
+        now = time.time()
+        recent = sum(1 for request in self.requests if now - request < self.request_period)
+        return max(self.max_requests - recent, 0)
+
     async def wait_for_ratelimit_end(self):
         wait_amount = self.request_period - (time.time() - min(self.requests))
         logger.warning(
@@ -115,6 +346,7 @@ class AmariClient:
 
         await asyncio.sleep(wait_amount)
 
+    @_recorded
     async def fetch_user(
         self, guild_id: int, user_id: int, cache: bool = False
     ) -> User:
@@ -136,20 +368,16 @@ class AmariClient:
             The user object.
         """
         if cache:
-            key = ("fetch_user", guild_id, user_id)
-            data = await self.cache.get(key)
-            if data:
-                return User(guild_id, data)
-            else:
-                data = await self.request(f"guild/{guild_id}/member/{user_id}")
-                await self.cache.set(key, data)
-                return User(guild_id, data)
+            key = ("fetch_user", guild_id, int(user_id))
+            data = await self._cached_request(key, f"guild/{guild_id}/member/{user_id}")
+            return User(guild_id, data)
         else:
             data = await self.request(f"guild/{guild_id}/member/{user_id}")
             return User(guild_id, data)
 
+    @_recorded
     async def fetch_users(
-        self, guild_id: int, user_ids: List[int], cache: bool = False
+        self, guild_id: int, user_ids: List[int], cache: bool = False, frozen: bool = False
     ) -> Users:
         """
         Fetches multiple users from the Amari API.
@@ -162,24 +390,29 @@ class AmariClient:
             The IDs of the users you would like to fetch.
         cache: bool
             Whether to use caching for this request.
+        frozen: bool
+            Whether to return :class:`FrozenUsers`.
 
         Returns
         -------
         Users
             The users object containing the fetched users.
         """
+        cls = FrozenUsers if frozen else Users
         if cache:
             members = []
             uncached_user_ids = []
 
-            for user_id in user_ids:
-                key = ("fetch_user", guild_id, user_id)
-                data = await self.cache.get(key)
+            keys = [("fetch_user", guild_id, int(user_id)) for user_id in user_ids]
+            for user_id, data in zip(user_ids, await self.cache.get_many(keys)):
+                if isinstance(data, NotFound):
+                    continue
                 if data:
                     members.append(data)
                 else:
                     uncached_user_ids.append(user_id)
 
+            _set_outcome("miss" if uncached_user_ids else "hit")
             if uncached_user_ids:
                 converted_user_ids = [str(user_id) for user_id in uncached_user_ids]
                 body = {"members": converted_user_ids}
@@ -189,29 +422,43 @@ class AmariClient:
                     extra_headers={"Content-Type": "application/json"},
                     json=body,
                 )
+                missing_user_ids = {int(user_id) for user_id in uncached_user_ids}
+                fetched = {}
                 for user_data in fetched_data["members"]:
                     user_id = int(user_data["id"])
-                    key = ("fetch_user", guild_id, user_id)
-                    await self.cache.set(key, user_data)
+                    fetched[("fetch_user", guild_id, user_id)] = user_data
                     members.append(user_data)
+                    missing_user_ids.discard(user_id)
+                await self.cache.set_many(fetched)
+
+                # Remember members the API did not return, so fetch_user and later
+                # fetch_users calls do not ask for them again until the entry expires.
+                if missing_user_ids:
+                    missing = {
+                        ("fetch_user", guild_id, user_id): NotFound(None, "Member was not found.")
+                        for user_id in missing_user_ids
+                    }
+                    await self.cache.set_many(missing, ttl=self.not_found_ttl)
 
             data = {
                 "members": members,
                 "total_members": len(members),
                 "queried_members": len(user_ids),
             }
-            return Users(guild_id, data)
+            return await self._build(cls, guild_id, data)
         else:
             converted_user_ids = [str(user_id) for user_id in user_ids]
             body = {"members": converted_user_ids}
-            data = await self.request(
+            return await self._request_object(
+                cls,
+                guild_id,
                 f"guild/{guild_id}/members",
                 method="POST",
                 extra_headers={"Content-Type": "application/json"},
                 json=body,
             )
-            return Users(guild_id, data)
 
+    @_recorded
     async def fetch_leaderboard(
         self,
         guild_id: int,
@@ -222,6 +469,7 @@ class AmariClient:
         page: Optional[int] = None,
         limit: Optional[int] = None,
         cache: bool = False,
+        frozen: bool = False,
     ) -> Leaderboard:
         """
         Fetches a guild's leaderboard from the Amari API.
@@ -241,19 +489,31 @@ class AmariClient:
             The amount of users to fetch per page.
         cache: bool
             Whether to use caching for this request.
+        frozen: bool
+            Whether to return a :class:`FrozenLeaderboard`. Cached frozen leaderboards are
+            shared between callers for as long as any of them holds a reference.
 
         Returns
         -------
         Leaderboard
             The guild's leaderboard.
         """
+        cls = FrozenLeaderboard if frozen else Leaderboard
+        if raw and page:
+            raise ValueError("raw endpoints do not support pagination")
+        if cache and raw and limit is None:
+            return await self.fetch_full_leaderboard(
+                guild_id, weekly=weekly, cache=True, frozen=frozen
+            )
+        if cache and not raw and self.leaderboard_policy is not None:
+            data = await self._slice_raw_leaderboard(guild_id, weekly, page, limit)
+            if data is not None:
+                return await self._build(cls, guild_id, data)
         if cache:
             key = ("fetch_leaderboard", guild_id, weekly, raw, page, limit)
-            data = await self.cache.get(key)
+            data = await self._get_cached(key)
             if data:
-                return Leaderboard(guild_id, data)
-        if raw and page:
-            raise ValueError("raw endpoints do not support pagination")
+                return await self._build(cls, guild_id, data, key=key if frozen else None)
         params = {}
         if page is not None:
             params["page"] = page
@@ -264,13 +524,64 @@ class AmariClient:
         if raw:
             endpoint.insert(1, "raw")
 
-        data = await self.request("/".join(endpoint), params=params)
         if cache:
-            await self.cache.set(key, data)
-        return Leaderboard(guild_id, data)
+            data = await self._cached_request(key, "/".join(endpoint), params=params)
+            if not raw and self.leaderboard_policy is not None:
+                board = (guild_id, weekly)
+                self._total_counts[board] = data.get("total_count")
+                self._total_counts.move_to_end(board)
+                if len(self._total_counts) > _TOTAL_COUNTS_SIZE:
+                    self._total_counts.popitem(last=False)
+            return await self._build(cls, guild_id, data, key=key if frozen else None)
+        if raw and limit is None and not weekly and self.history is not None:
+            data = await self.request("/".join(endpoint), params=params)
+            self._record_history(guild_id, data)
+            return await self._build(cls, guild_id, data)
+        return await self._request_object(cls, guild_id, "/".join(endpoint), params=params)
+
+    async def _slice_raw_leaderboard(
+        self, guild_id: int, weekly: bool, page: Optional[int], limit: Optional[int]
+    ) -> Optional[Dict]:
+        board = (guild_id, weekly)
+        key = ("fetch_full_leaderboard", guild_id, weekly)
+        data = await self._get_cached(key)
+        if not data:
+            now = time.time()
+            self._prune_page_requests(now)
+            requests = [
+                timestamp
+                for timestamp in self._page_requests.pop(board, [])
+                if now - timestamp < self.cache.ttl
+            ]
+            requests.append(now)
+            self._page_requests[board] = requests
+            if not self.leaderboard_policy.should_fetch_raw(
+                len(requests), self._total_counts.get(board)
+            ):
+                return None
+
+            lb_type = "weekly" if weekly else "leaderboard"
+            data = await self._cached_request(key, f"guild/raw/{lb_type}/{guild_id}")
+            # Concurrent callers fetching the same raw leaderboard all reach this line.
+            self._page_requests.pop(board, None)
 
+        # Mirror the API's pagination defaults so sliced pages match fetched ones.
+        page = page or 1
+        limit = limit or 50
+        members = data["data"][(page - 1) * limit : page * limit]
+        return {"count": len(members), "total_count": len(data["data"]), "data": members}
+
+    def _prune_page_requests(self, now: float):
+        # Leaderboards that were not paged within the cache TTL are at the front.
+        while self._page_requests:
+            board, requests = next(iter(self._page_requests.items()))
+            if now - requests[-1] < self.cache.ttl:
+                break
+            del self._page_requests[board]
+
+    @_recorded
     async def fetch_full_leaderboard(
-        self, guild_id: int, /, *, weekly: bool = False, cache: bool = False
+        self, guild_id: int, /, *, weekly: bool = False, cache: bool = False, frozen: bool = False
     ) -> Leaderboard:
         """
         Fetches a guild's full leaderboard from the Amari API.
@@ -283,25 +594,88 @@ class AmariClient:
             Choose either to fetch the weekly leaderboard or the regular leaderboard.
         cache: bool
             Whether to use caching for this request.
+        frozen: bool
+            Whether to return a :class:`FrozenLeaderboard`. Cached frozen leaderboards are
+            shared between callers for as long as any of them holds a reference.
 
         Returns
         -------
         Leaderboard
             The guild's leaderboard.
         """
-        if cache:
-            key = ("fetch_full_leaderboard", guild_id, weekly)
-            data = await self.cache.get(key)
-            if data:
-                return Leaderboard(guild_id, data)
+        cls = FrozenLeaderboard if frozen else Leaderboard
         lb_type = "weekly" if weekly else "leaderboard"
-        data = await self.request(f"guild/raw/{lb_type}/{guild_id}")
+        endpoint = f"guild/raw/{lb_type}/{guild_id}"
         if cache:
-            await self.cache.set(key, data)
-        return Leaderboard(guild_id, data)
+            key = ("fetch_full_leaderboard", guild_id, weekly)
+            data = await self._cached_request(key, endpoint)
+            if not weekly:
+                self._record_history(guild_id, data)
+            return await self._build(cls, guild_id, data, key=key if frozen else None)
+        if weekly or self.history is None:
+            return await self._request_object(cls, guild_id, endpoint)
+        data = await self.request(endpoint)
+        self._record_history(guild_id, data)
+        return await self._build(cls, guild_id, data)
+
+    @_recorded
+    async def fetch_combined_leaderboard(
+        self, guild_id: int, /, *, cache: bool = False
+    ) -> CombinedLeaderboard:
+        """
+        Fetches a guild's full regular and weekly leaderboards, and aligns them.
+
+        Both leaderboards are fetched concurrently. With caching, the aligned leaderboard
+        is shared between callers for as long as both cached leaderboards are unchanged
+        and any caller holds a reference.
+
+        Parameters
+        ----------
+        guild_id: int
+            The guild ID to fetch the leaderboards from.
+        cache: bool
+            Whether to use caching for this request.
+
+        Returns
+        -------
+        CombinedLeaderboard
+            The guild's combined leaderboard.
+        """
+        endpoints = (f"guild/raw/leaderboard/{guild_id}", f"guild/raw/weekly/{guild_id}")
+        if not cache:
+            data, weekly_data = await asyncio.gather(*map(self.request, endpoints))
+            self._record_history(guild_id, data)
+            return CombinedLeaderboard(guild_id, data, weekly_data)
+
+        data, weekly_data = await asyncio.gather(
+            *(
+                self._cached_request(("fetch_full_leaderboard", guild_id, weekly), endpoint)
+                for weekly, endpoint in zip((False, True), endpoints)
+            )
+        )
+        self._record_history(guild_id, data)
+        key = ("fetch_combined_leaderboard", guild_id)
+        combined = self._snapshots.get(key)
+        if combined is not None:
+            source, weekly_source = combined._source
+            if source is data and weekly_source is weekly_data:
+                return combined
+
+        combined = CombinedLeaderboard(guild_id, data, weekly_data)
+        combined._source = (data, weekly_data)
+        self._snapshots[key] = combined
+        return combined
 
+    @_recorded
     async def fetch_rewards(
-        self, guild_id: int, /, *, page: int = 1, limit: int = 50, cache: bool = False
+        self,
+        guild_id: int,
+        /,
+        *,
+        page: int = 1,
+        limit: int = 50,
+        cache: bool = False,
+        frozen: bool = False,
     ) -> Rewards:
         """
         Fetches a guild's role rewards from the Amari API.
@@ -316,22 +690,317 @@ class AmariClient:
             The amount of rewards to fetch per page.
         cache: bool
             Whether to use caching for this request.
+        frozen: bool
+            Whether to return :class:`FrozenRewards`. Cached frozen rewards are shared
+            between callers for as long as any of them holds a reference.
 
         Returns
         -------
         Rewards
             The guild's role rewards.
         """
-        if cache:
-            key = ("fetch_rewards", guild_id, page, limit)
-            data = await self.cache.get(key)
-            if data:
-                return Rewards(guild_id, data)
+        cls = FrozenRewards if frozen else Rewards
         params = {"page": page, "limit": limit}
-        data = await self.request(f"guild/rewards/{guild_id}", params=params)
         if cache:
-            await self.cache.set(key, data)
-        return Rewards(guild_id, data)
+            key = ("fetch_rewards", guild_id, page, limit)
+            data = await self._cached_request(key, f"guild/rewards/{guild_id}", params=params)
+            return await self._build(cls, guild_id, data, key=key if frozen else None)
+        return await self._request_object(
+            cls, guild_id, f"guild/rewards/{guild_id}", params=params
+        )
+
+    async def bulk_fetch_leaderboards(
+        self,
+        guild_ids: Iterable[int],
+        /,
+        *,
+        weekly: bool = False,
+        page: Optional[int] = None,
+        limit: Optional[int] = None,
+        cache: bool = True,
+        concurrency: int = 8,
+    ) -> AsyncIterator[BulkResult]:
+        """
+        Fetches the leaderboards of many guilds, yielding each one as soon as it is ready.
+
+        Duplicate guild IDs are fetched once. Cached leaderboards are yielded first, then
+        the others are fetched in order by a bounded number of workers, so no guild is
+        starved and the ratelimit budget is not exceeded. An error for one guild is
+        yielded as its result instead of failing the whole batch.
+
+        Parameters
+        ----------
+        guild_ids: Iterable[int]
+            The guild IDs to fetch the leaderboards from.
+        weekly: bool
+            Choose either to fetch the weekly leaderboards or the regular leaderboards.
+        page: Optional[int]
+            The leaderboard page to fetch. The full leaderboards are fetched when neither
+            ``page`` nor ``limit`` are given.
+        limit: Optional[int]
+            The amount of users to fetch per page.
+        cache: bool
+            Whether to use caching for these requests.
+        concurrency: int
+            The maximum number of requests made at once.
+
+        Yields
+        ------
+        BulkResult
+            The leaderboard, or the error, of each guild.
+        """
+        full = page is None and limit is None
+
+        def key_for(guild_id: int) -> Tuple:
+            if full:
+                return ("fetch_full_leaderboard", guild_id, weekly)
+            return ("fetch_leaderboard", guild_id, weekly, False, page, limit)
+
+        if full:
+            method, kwargs = "fetch_full_leaderboard", {"weekly": weekly, "cache": cache}
+        else:
+            method = "fetch_leaderboard"
+            kwargs = {"weekly": weekly, "page": page, "limit": limit, "cache": cache}
+
+        async for result in self._bulk_fetch(
+            guild_ids, Leaderboard, key_for if cache else None, method, kwargs, concurrency
+        ):
+            yield result
+
+    async def bulk_fetch_rewards(
+        self,
+        guild_ids: Iterable[int],
+        /,
+        *,
+        page: int = 1,
+        limit: int = 50,
+        cache: bool = True,
+        concurrency: int = 8,
+    ) -> AsyncIterator[BulkResult]:
+        """
+        Fetches the role rewards of many guilds, yielding each one as soon as it is ready.
+
+        Scheduling is the same as :meth:`bulk_fetch_leaderboards`.
+
+        Parameters
+        ----------
+        guild_ids: Iterable[int]
+            The guild IDs to fetch the role rewards from.
+        page: int
+            The rewards page to fetch.
+        limit: int
+            The amount of rewards to fetch per page.
+        cache: bool
+            Whether to use caching for these requests.
+        concurrency: int
+            The maximum number of requests made at once.
+
+        Yields
+        ------
+        BulkResult
+            The role rewards, or the error, of each guild.
+        """
+
+        def key_for(guild_id: int) -> Tuple:
+            return ("fetch_rewards", guild_id, page, limit)
+
+        kwargs = {"page": page, "limit": limit, "cache": cache}
+        async for result in self._bulk_fetch(
+            guild_ids, Rewards, key_for if cache else None, "fetch_rewards", kwargs, concurrency
+        ):
+            yield result
+
+    async def _bulk_fetch(
+        self,
+        guild_ids: Iterable[int],
+        cls: Type,
+        key_for: Optional[Callable[[int], Tuple]],
+        method: str,
+        kwargs: Dict,
+        concurrency: int,
+    ) -> AsyncIterator[BulkResult]:
+        # Cache misses are fetched with the given client method, called with the guild ID
+        # and kwargs. Cache hits are recorded as calls to that method.
+        fetch = getattr(self, method)
+        recorder = _active_recorder(self)
+        misses = deque()
+        guild_ids = list(dict.fromkeys(guild_ids))
+        start = time.perf_counter()
+        if key_for is not None:
+            cached = await self._get_many_cached([key_for(guild_id) for guild_id in guild_ids])
+        else:
+            cached = [None] * len(guild_ids)
+        latency = time.perf_counter() - start
+
+        for guild_id, data in zip(guild_ids, cached):
+            if not data:
+                misses.append(guild_id)
+                continue
+            if recorder is not None:
+                error = type(data).__name__ if isinstance(data, NotFound) else None
+                recorder.record(method, (guild_id,), kwargs, "hit", latency, error)
+            if isinstance(data, NotFound):
+                yield BulkResult(guild_id, error=data.with_traceback(None))
+            else:
+                yield BulkResult(guild_id, await self._build(cls, guild_id, data))
+
+        if not misses:
+            return
+
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def worker():
+            # Workers take guilds in order, so every guild is served in turn.
+            while misses:
+                guild_id = misses.popleft()
+                try:
+                    result = BulkResult(guild_id, await fetch(guild_id, **kwargs))
+                except Exception as error:
+                    result = BulkResult(guild_id, error=error)
+                results.put_nowait(result)
+
+        count = len(misses)
+        workers = min(concurrency, count)
+        if self.use_anti_ratelimit:
+            # Do not start more requests at once than the ratelimit budget allows.
+            workers = min(workers, max(self.remaining_requests(), 1))
+
+        tasks = [asyncio.ensure_future(worker()) for _ in range(workers)]
+        try:
+            for _ in range(count):
+                yield await results.get()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _build(
+        self, cls: Type[T], guild_id: int, data: Dict, *, key: Optional[Tuple] = None
+    ) -> T:
+        # Frozen snapshots of cached data are shared, keyed by their cache key.
+        # The snapshot is only reused while the cache still holds the same data.
+        if key is not None:
+            snapshot = self._snapshots.get(key)
+            if snapshot is not None and snapshot._source is data:
+                return snapshot
+
+        if self.offloader is not None:
+            obj = await self.offloader.build(cls, guild_id, data)
+        else:
+            obj = cls(guild_id, data)
+
+        if key is not None:
+            obj._source = data
+            self._snapshots[key] = obj
+        return obj
+
+    def _record_history(self, guild_id: int, data: Dict):
+        # Only full regular leaderboards are recorded, as snapshots of a guild are
+        # deduplicated with min_interval and a page would hide the full leaderboard that
+        # follows it. The exp of weekly leaderboards is the weekly exp.
+        # The snapshot is stored in the history's own thread, off the event loop.
+        if self.history is not None:
+            try:
+                future = self.history.submit(guild_id, data["data"])
+            except Exception:
+                logger.exception(f"Failed to record the leaderboard of guild {guild_id}.")
+            else:
+                future.add_done_callback(functools.partial(_log_history_error, guild_id))
+
+    async def _get_cached(self, key: Tuple) -> Optional[Dict]:
+        refreshing = _refreshing.get()
+        if refreshing is not None:
+            refreshing.append(key)
+            return None
+        data = await self.cache.get(key)
+        if data is not None:
+            _set_outcome("hit")
+        if isinstance(data, NotFound):
+            # Drop the traceback of the previous raise so it does not keep growing.
+            raise data.with_traceback(None)
+        return data
+
+    async def _get_many_cached(self, keys: List[Tuple]) -> List[Optional[Dict]]:
+        # Like _get_cached, but cached NotFound errors are returned instead of raised.
+        refreshing = _refreshing.get()
+        if refreshing is not None:
+            refreshing.extend(keys)
+            return [None] * len(keys)
+        return await self.cache.get_many(keys)
+
+    async def _cached_request(self, key: Tuple, endpoint: str, **kwargs) -> Dict:
+        """
+        Makes a request through the cache.
+
+        Concurrent calls for the same key share a single request, and :exc:`NotFound`
+        responses are cached for :attr:`not_found_ttl` seconds. Expired entries with an
+        ETag or Last-Modified header are revalidated, and kept without decoding the
+        body again when the API answers 304 Not Modified.
+        """
+        data = await self._get_cached(key)
+        if data:
+            return data
+
+        task = self._inflight.get(key)
+        if task is None:
+            # The request runs in its own task, so cancelling the caller that started it
+            # does not cancel it for the other callers waiting on the same key.
+            task = asyncio.ensure_future(self._fetch_into_cache(key, endpoint, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(functools.partial(self._request_done, key))
+        else:
+            _set_outcome("shared")
+
+        # Each caller waits until its own deadline. Timeouts are counted here rather than
+        # in the shared request, so every failed call is counted once.
+        try:
+            return await self._until(asyncio.shield(task), _deadline.get())
+        except asyncio.TimeoutError:
+            self.stats.timeouts += 1
+            raise DeadlineExceeded("the request did not complete before its deadline") from None
+        except DeadlineExceeded:
+            self.stats.timeouts += 1
+            raise
+
+    async def _fetch_into_cache(self, key: Tuple, endpoint: str, **kwargs) -> Dict:
+        # The task copied the context of the caller that started it. Its deadline is not
+        # applied to the shared request, which other callers without it wait for too.
+        _deadline.set(None)
+        try:
+            return await self._revalidate(key, endpoint, **kwargs)
+        except NotFound as error:
+            await self.cache.set(key, error, ttl=self.not_found_ttl)
+            raise
+
+    def _request_done(self, key: Tuple, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved when nobody else was waiting for it.
+            task.exception()
+
+    async def _revalidate(
+        self, key: Tuple, endpoint: str, *, extra_headers: Dict = {}, **kwargs
+    ) -> Dict:
+        entry = await self.cache.get_stale(key)
+        if entry is not None and not isinstance(entry.data, NotFound):
+            extra_headers = dict(extra_headers)
+            if entry.etag is not None:
+                extra_headers["If-None-Match"] = entry.etag
+            if entry.last_modified is not None:
+                extra_headers["If-Modified-Since"] = entry.last_modified
+
+        status, headers, data = await self._send(endpoint, extra_headers=extra_headers, **kwargs)
+        if status == 304 and entry is not None:
+            _set_outcome("revalidated")
+            await self.cache.touch(key)
+            return entry.data
+
+        _set_outcome("miss")
+        await self.cache.set(
+            key, data, etag=headers.get("ETag"), last_modified=headers.get("Last-Modified")
+        )
+        return data
 
     @classmethod
     async def check_response_for_errors(cls, response: aiohttp.ClientResponse):
@@ -351,22 +1020,155 @@ class AmariClient:
         params: Dict = {},
         json: Dict = {},
         extra_headers: Dict = {},
+        timeout: Optional[float] = None,
     ) -> Dict:
+        try:
+            _, _, data = await self._send(
+                endpoint,
+                method=method,
+                params=params,
+                json=json,
+                extra_headers=extra_headers,
+                timeout=timeout,
+            )
+        except DeadlineExceeded:
+            self.stats.timeouts += 1
+            raise
+        return data
+
+    async def _request_object(self, cls: Type[T], guild_id: int, endpoint: str, **kwargs) -> T:
+        # Makes an uncached request whose decoded data is only used to build an object.
+        # With an offloader, the body is decoded and the object built in one executor
+        # call, so a process pool only sends back the object, which pickles compactly.
+        if self.offloader is None:
+            return await self._build(cls, guild_id, await self.request(endpoint, **kwargs))
+        try:
+            _, _, obj = await self._send(
+                endpoint, decode=functools.partial(self.offloader.load, cls, guild_id), **kwargs
+            )
+        except DeadlineExceeded:
+            self.stats.timeouts += 1
+            raise
+        return obj
+
+    async def _send(
+        self,
+        endpoint: str,
+        *,
+        method: str = "GET",
+        params: Dict = {},
+        json: Dict = {},
+        extra_headers: Dict = {},
+        timeout: Optional[float] = None,
+        decode: Optional[Callable[[bytes], Awaitable]] = None,
+    ) -> Tuple[int, Mapping[str, str], Optional[Dict]]:
         headers = dict(self._default_headers, **extra_headers)
+        deadline = self._get_deadline(timeout)
+        attempt = functools.partial(
+            self._attempt,
+            method,
+            self.BASE_URL + endpoint,
+            headers,
+            params,
+            json,
+            deadline,
+            decode,
+        )
 
-        if self.use_anti_ratelimit:
-            await self.check_ratelimit()
+        try:
+            if self.use_anti_ratelimit:
+                start = time.perf_counter()
+                try:
+                    await self._until(self.check_ratelimit(), deadline)
+                finally:
+                    self.stats.ratelimit_wait += time.perf_counter() - start
+
+            if method == "GET" and self._can_hedge():
+                return await self._hedged(attempt, deadline)
+            return await attempt()
+        except asyncio.TimeoutError:
+            # Requests with a deadline only use its timeout, so other timeouts, for example
+            # those of the session, are left as they are.
+            if deadline is None:
+                raise
+            raise DeadlineExceeded("the request did not complete before its deadline") from None
+
+    def _can_hedge(self) -> bool:
+        if self.hedge_percentile is None or self.stats.samples < 20:
+            return False
+        return not self.use_anti_ratelimit or self.remaining_requests() >= self.max_requests / 4
+
+    async def _hedged(self, attempt: Callable[[], Awaitable[T]], deadline: Optional[float]) -> T:
+        delay = self.stats.latency_percentile(self.hedge_percentile)
+        if deadline is not None:
+            delay = min(delay, max(deadline - asyncio.get_running_loop().time(), 0))
+        tasks = [asyncio.ensure_future(attempt())]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not self._can_hedge():
+                return await tasks[0]
 
-        async with self.session.request(
+            self.stats.hedged += 1
+            tasks.append(asyncio.ensure_future(attempt()))
+            first, second = tasks
+            pending = {first, second}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    # Prefer an answer over an error while the other request may still succeed.
+                    if task.exception() is None or not pending:
+                        if task is second:
+                            self.stats.hedge_wins += 1
+                        return task.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()
+
+    async def _attempt(
+        self,
+        method: str,
+        url: str,
+        headers: Dict,
+        params: Dict,
+        json: Dict,
+        deadline: Optional[float],
+        decode: Optional[Callable[[bytes], Awaitable]],
+    ) -> Tuple[int, Mapping[str, str], Optional[Dict]]:
+        kwargs = {}
+        if deadline is not None:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=remaining)
+
+        session = self.session
+        await self._close_stale_sessions()
+
+        start = time.perf_counter()
+        self.stats.requests += 1
+        async with session.request(
             method=method,
-            url=self.BASE_URL + endpoint,
+            url=url,
             json=json,
             headers=headers,
             params=params,
+            **kwargs,
         ) as response:
             if self.use_anti_ratelimit:
                 self.requests.append(time.time())
 
             await self.check_response_for_errors(response)
 
-            return await response.json()
+            if response.status == 304:
+                data = None
+            elif decode is not None:
+                data = await decode(await response.read())
+            elif self.offloader is not None:
+                data = await self.offloader.decode(await response.read())
+            else:
+                data = await response.json()
+        self.stats.record_latency(time.perf_counter() - start)
+        return response.status, response.headers, data
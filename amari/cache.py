@@ -1,22 +1,199 @@
+import abc
 import asyncio
 import json
 import time
 from collections import OrderedDict
-from typing import Any, Optional, Tuple
+from typing import Any, Iterable, List, Mapping, Optional, Tuple
+
+__all__ = ("CacheBackend", "Cache", "RawLeaderboardPolicy")
 
 
 class CacheEntry:
-    __slots__ = ("data", "timestamp", "size")
+    __slots__ = ("data", "timestamp", "size", "ttl", "hits", "etag", "last_modified")
 
-    def __init__(self, data: Any, timestamp: float, size: int):
+    def __init__(
+        self,
+        data: Any,
+        timestamp: float,
+        size: int,
+        ttl: float,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
         self.data = data
         self.timestamp = timestamp
         self.size = size
+        self.ttl = ttl
+        self.hits = 0
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def expires_at(self, stale_ttl: float) -> float:
+        # Entries with validators are kept past their TTL so they can be revalidated.
+        if self.etag is not None or self.last_modified is not None:
+            return self.timestamp + self.ttl + stale_ttl
+        return self.timestamp + self.ttl
+
+
+class CacheBackend(abc.ABC):
+    """
+    The interface of the caches used by :class:`AmariClient`.
+
+    Keys are tuples of strings and integers. Values are decoded JSON responses, or
+    :exc:`NotFound` errors for negative entries, which backends must store and return
+    as :exc:`NotFound` instances.
+
+    Subclasses must implement :meth:`get`, :meth:`set` and :meth:`delete`. The batch
+    methods call them once per key by default, and revalidation and hit counting are
+    optional.
+
+    Attributes
+    ----------
+    ttl: float
+        The default time to live for cache entries, in seconds.
+    """
+
+    ttl: float
+
+    @abc.abstractmethod
+    async def get(self, key: Tuple) -> Optional[Any]:
+        """
+        Gets a fresh entry.
+
+        Parameters
+        ----------
+        key: Tuple
+            The cache key.
+
+        Returns
+        -------
+        Optional[Any]
+            The cached data, or ``None`` if the key is missing or expired.
+        """
+
+    @abc.abstractmethod
+    async def set(
+        self,
+        key: Tuple,
+        data: Any,
+        *,
+        ttl: Optional[float] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        """
+        Stores data in the cache.
+
+        Parameters
+        ----------
+        key: Tuple
+            The cache key.
+        data: Any
+            The JSON serializable data, or an exception to store a negative entry.
+        ttl: Optional[float]
+            The time to live for this entry, in seconds. Defaults to :attr:`ttl`.
+        etag: Optional[str]
+            The response's ETag header, used to revalidate the entry once it expires.
+        last_modified: Optional[str]
+            The response's Last-Modified header, used to revalidate the entry once it expires.
+        """
+
+    @abc.abstractmethod
+    async def delete(self, key: Tuple):
+        """
+        Removes an entry.
+
+        Parameters
+        ----------
+        key: Tuple
+            The cache key.
+        """
 
+    async def get_many(self, keys: Iterable[Tuple]) -> List[Optional[Any]]:
+        """
+        Gets many fresh entries.
 
-class Cache:
+        Parameters
+        ----------
+        keys: Iterable[Tuple]
+            The cache keys.
+
+        Returns
+        -------
+        List[Optional[Any]]
+            The cached data of each key, or ``None`` for keys that are missing or expired.
+        """
+        return [await self.get(key) for key in keys]
+
+    async def set_many(self, items: Mapping[Tuple, Any], *, ttl: Optional[float] = None):
+        """
+        Stores many entries.
+
+        Parameters
+        ----------
+        items: Mapping[Tuple, Any]
+            The data to store for each cache key.
+        ttl: Optional[float]
+            The time to live for these entries, in seconds. Defaults to :attr:`ttl`.
+        """
+        for key, data in items.items():
+            await self.set(key, data, ttl=ttl)
+
+    async def get_stale(self, key: Tuple) -> Optional[CacheEntry]:
+        """
+        Gets an entry even if it has expired, to revalidate it.
+
+        Backends that do not keep expired entries return ``None``.
+
+        Parameters
+        ----------
+        key: Tuple
+            The cache key.
+
+        Returns
+        -------
+        Optional[CacheEntry]
+            The entry, if it is still kept.
+        """
+        return None
+
+    async def touch(self, key: Tuple):
+        """
+        Restarts the TTL of an entry, after it was revalidated.
+
+        Parameters
+        ----------
+        key: Tuple
+            The cache key.
+        """
+
+    def hits(self, key: Tuple) -> int:
+        """
+        The number of times an entry was read since it was last stored.
+
+        Backends that do not count hits return 0.
+
+        Parameters
+        ----------
+        key: Tuple
+            The cache key.
+
+        Returns
+        -------
+        int
+            The entry's hit count, or 0 if the key is not cached.
+        """
+        return 0
+
+    async def close(self):
+        """Releases the resources held by the backend."""
+
+
+class Cache(CacheBackend):
     """
-    A simple LRU cache with TTL and size limit.
+    A simple in-memory LRU cache with TTL and size limit.
+
+    This is the default cache of :class:`AmariClient`, private to its process.
 
     Attributes
     ----------
@@ -24,11 +201,20 @@ class Cache:
         Time to live for cache entries, in seconds.
     maxbytes: int
         Maximum total size of cached data in bytes.
+    stale_ttl: int
+        How long expired entries with an ETag or Last-Modified validator are kept
+        for revalidation, in seconds.
     """
 
-    def __init__(self, ttl: int, maxbytes: int = 25 * 1024 * 1024):  # 25 MiB
+    def __init__(
+        self,
+        ttl: int,
+        maxbytes: int = 25 * 1024 * 1024,  # 25 MiB
+        stale_ttl: int = 300,
+    ):
         self.ttl = ttl
         self.maxbytes = maxbytes
+        self.stale_ttl = stale_ttl
         self.cache: OrderedDict[Tuple, CacheEntry] = OrderedDict()
         self.total_size = 0
         self.lock = asyncio.Lock()
@@ -38,23 +224,160 @@ class Cache:
             self._remove_expired_entries()
             entry = self.cache.get(key)
             if entry:
-                if time.time() - entry.timestamp < self.ttl:
+                if time.time() - entry.timestamp < entry.ttl:
                     self.cache.move_to_end(key)
+                    entry.hits += 1
                     return entry.data
-                else:
-                    self._remove_entry(key)
             return None
 
-    async def set(self, key: Tuple, data: Any):
+    async def get_stale(self, key: Tuple) -> Optional[CacheEntry]:
+        """
+        Gets an entry even if it has expired, to revalidate it.
+
+        Parameters
+        ----------
+        key: Tuple
+            The cache key.
+
+        Returns
+        -------
+        Optional[CacheEntry]
+            The entry, if it is still kept.
+        """
         async with self.lock:
-            size = len(json.dumps(data).encode("utf-8"))
-            entry = CacheEntry(data, time.time(), size)
-            self.cache[key] = entry
-            self.cache.move_to_end(key)
-            self.total_size += size
+            self._remove_expired_entries()
+            return self.cache.get(key)
+
+    async def touch(self, key: Tuple):
+        """
+        Restarts the TTL of an entry, after it was revalidated.
+
+        Parameters
+        ----------
+        key: Tuple
+            The cache key.
+        """
+        async with self.lock:
+            entry = self.cache.get(key)
+            if entry:
+                entry.timestamp = time.time()
+                self.cache.move_to_end(key)
+
+    async def set(
+        self,
+        key: Tuple,
+        data: Any,
+        *,
+        ttl: Optional[float] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        """
+        Stores data in the cache.
+
+        Parameters
+        ----------
+        key: Tuple
+            The cache key.
+        data: Any
+            The JSON serializable data, or an exception to store a negative entry.
+        ttl: Optional[float]
+            The time to live for this entry, in seconds. Defaults to :attr:`ttl`.
+        etag: Optional[str]
+            The response's ETag header, used to revalidate the entry once it expires.
+        last_modified: Optional[str]
+            The response's Last-Modified header, used to revalidate the entry once it expires.
+        """
+        async with self.lock:
+            self._store(key, data, time.time(), ttl, etag, last_modified)
+            self._remove_expired_entries()
+            await self._enforce_size_limit()
+
+    async def get_many(self, keys: Iterable[Tuple]) -> List[Optional[Any]]:
+        """
+        Gets many fresh entries, taking the lock and removing expired entries only once.
+
+        Parameters
+        ----------
+        keys: Iterable[Tuple]
+            The cache keys.
+
+        Returns
+        -------
+        List[Optional[Any]]
+            The cached data of each key, or ``None`` for keys that are missing or expired.
+        """
+        async with self.lock:
+            self._remove_expired_entries()
+            current_time = time.time()
+            values = []
+            for key in keys:
+                entry = self.cache.get(key)
+                if entry and current_time - entry.timestamp < entry.ttl:
+                    self.cache.move_to_end(key)
+                    entry.hits += 1
+                    values.append(entry.data)
+                else:
+                    values.append(None)
+            return values
+
+    async def set_many(self, items: Mapping[Tuple, Any], *, ttl: Optional[float] = None):
+        """
+        Stores many entries, taking the lock and removing expired entries only once.
+
+        Parameters
+        ----------
+        items: Mapping[Tuple, Any]
+            The data to store for each cache key.
+        ttl: Optional[float]
+            The time to live for these entries, in seconds. Defaults to :attr:`ttl`.
+        """
+        async with self.lock:
+            current_time = time.time()
+            for key, data in items.items():
+                self._store(key, data, current_time, ttl)
             self._remove_expired_entries()
             await self._enforce_size_limit()
 
+    async def delete(self, key: Tuple):
+        async with self.lock:
+            self._remove_entry(key)
+
+    def hits(self, key: Tuple) -> int:
+        """
+        The number of times an entry was read since it was last stored.
+
+        Parameters
+        ----------
+        key: Tuple
+            The cache key.
+
+        Returns
+        -------
+        int
+            The entry's hit count, or 0 if the key is not cached.
+        """
+        entry = self.cache.get(key)
+        return entry.hits if entry else 0
+
+    def _store(
+        self,
+        key: Tuple,
+        data: Any,
+        timestamp: float,
+        ttl: Optional[float],
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        if isinstance(data, BaseException):
+            size = len(str(data).encode("utf-8"))
+        else:
+            size = len(json.dumps(data).encode("utf-8"))
+        ttl = self.ttl if ttl is None else ttl
+        self._remove_entry(key)
+        self.cache[key] = CacheEntry(data, timestamp, size, ttl, etag, last_modified)
+        self.total_size += size
+
     def _remove_entry(self, key: Tuple):
         entry = self.cache.pop(key, None)
         if entry:
@@ -65,7 +388,7 @@ class Cache:
         keys_to_remove = [
             key
             for key, entry in self.cache.items()
-            if current_time - entry.timestamp >= self.ttl
+            if current_time >= entry.expires_at(self.stale_ttl)
         ]
         for key in keys_to_remove:
             self._remove_entry(key)
@@ -75,3 +398,48 @@ class Cache:
             key, entry = self.cache.popitem(last=False)
             self.total_size -= entry.size
             await asyncio.sleep(0)
+
+
+class RawLeaderboardPolicy:
+    """
+    Decides when paginated leaderboard requests should be served from the raw leaderboard.
+
+    When a fresh raw leaderboard for a guild is cached, every page of that leaderboard is
+    sliced from it locally. Otherwise, the raw leaderboard is fetched once the same
+    leaderboard has been requested ``page_threshold`` times within the cache TTL.
+
+    Attributes
+    ----------
+    page_threshold: int
+        The number of paginated requests for a leaderboard, within the cache TTL,
+        after which the raw leaderboard is fetched instead of individual pages.
+    max_members: Optional[int]
+        Leaderboards with more members than this are never fetched raw.
+        ``None`` means there is no limit.
+    """
+
+    def __init__(self, *, page_threshold: int = 2, max_members: Optional[int] = None):
+        self.page_threshold = page_threshold
+        self.max_members = max_members
+
+    def should_fetch_raw(self, page_requests: int, total_count: Optional[int]) -> bool:
+        """
+        Whether the raw leaderboard should be fetched instead of a page.
+
+        Parameters
+        ----------
+        page_requests: int
+            The number of paginated requests made for the leaderboard within the cache TTL,
+            including the current one.
+        total_count: Optional[int]
+            The total number of members in the leaderboard, if a page was fetched before.
+
+        Returns
+        -------
+        bool
+            Whether to fetch the raw leaderboard.
+        """
+        if self.max_members is not None:
+            if total_count is None or total_count > self.max_members:
+                return False
+        return page_requests >= self.page_threshold
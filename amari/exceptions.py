@@ -1,6 +1,9 @@
-from typing import Optional
+from __future__ import annotations
 
-import aiohttp
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import aiohttp
 
 __all__ = (
     "AmariException",
@@ -9,6 +12,8 @@ __all__ = (
     "InvalidToken",
     "RatelimitException",
     "AmariServerError",
+    "DeadlineExceeded",
+    "CacheError",
 )
 
 
@@ -16,25 +21,54 @@ class AmariException(Exception):
     """Base module Exception class."""
 
 
+class DeadlineExceeded(AmariException):
+    """Raised when a request does not complete before its deadline."""
+
+
+class CacheError(AmariException):
+    """Raised when a cache backend returns an error."""
+
+
 class HTTPException(AmariException):
-    """Base Exception for HTTP errors."""
+    """
+    Base Exception for HTTP errors.
+
+    Attributes
+    ----------
+    status: int
+        The HTTP status code.
+    response: Optional[aiohttp.ClientResponse]
+        The response that caused the error. This is ``None`` for errors created
+        from cached data rather than a response.
+    """
 
-    def __init__(self, response: aiohttp.ClientResponse, message: Optional[str] = None):
-        self.status: int = response.status
-        self.response: aiohttp.ClientResponse = response
+    def __init__(
+        self,
+        response: Optional[aiohttp.ClientResponse],
+        message: Optional[str] = None,
+        *,
+        status: Optional[int] = None,
+    ):
+        self.status: int = response.status if status is None else status
+        self.response: Optional[aiohttp.ClientResponse] = response
         message = f"({self.status}): {message}" if message else f"({self.status})"
         super().__init__(message)
 
 
 class NotFound(HTTPException):
-    """Raised when the guild or user is not found."""
+    """
+    Raised when the guild or user is not found.
+
+    These errors are cached for :attr:`AmariClient.not_found_ttl` seconds when
+    caching is used, so the same error instance may be raised more than once.
+    """
 
     def __init__(
         self,
-        response: aiohttp.ClientResponse,
+        response: Optional[aiohttp.ClientResponse],
         message: Optional[str] = "Guild or user was not found.",
     ):
-        super().__init__(response, message)
+        super().__init__(response, message, status=404)
 
 
 class InvalidToken(HTTPException):
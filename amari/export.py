@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import asyncio
+import csv
+import json
+import os
+import uuid
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple, Union
+
+from .objects import Leaderboard
+
+if TYPE_CHECKING:
+    from .api import AmariClient
+
+__all__ = ("export_leaderboard", "export_leaderboards", "load_leaderboard")
+
+FIELDS = ("id", "username", "exp", "level", "weeklyExp")
+FORMATS = {".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv", ".parquet": "parquet"}
+EXTENSIONS = {"ndjson": ".ndjson", "csv": ".csv", "parquet": ".parquet"}
+
+
+def _optional_int(value) -> Optional[int]:
+    return int(value) if value is not None and value != "" else None
+
+
+def _resolve_format(path: str, format: Optional[str]) -> str:
+    if format is None:
+        format = FORMATS.get(os.path.splitext(path)[1].lower())
+        if format is None:
+            raise ValueError(f"cannot infer the export format of {path!r}")
+    if format not in EXTENSIONS:
+        raise ValueError(f"unknown export format {format!r}")
+    return format
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError(
+            "pyarrow is required for Parquet files. Install it with `pip install amari.py[parquet]`"
+        ) from None
+    return pyarrow
+
+
+class _NDJSONWriter:
+    def __init__(self, path: str):
+        self.file = open(path, "w", encoding="utf-8")
+
+    def write(self, rows: List[Dict]):
+        self.file.write("".join(json.dumps(row, separators=(",", ":")) + "\n" for row in rows))
+
+    def close(self):
+        self.file.close()
+
+
+class _CSVWriter:
+    def __init__(self, path: str):
+        self.file = open(path, "w", encoding="utf-8", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(FIELDS)
+
+    def write(self, rows: List[Dict]):
+        self.writer.writerows([row.get(field) for field in FIELDS] for row in rows)
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetWriter:
+    def __init__(self, path: str):
+        pa = _import_pyarrow()
+        self.pa = pa
+        self.schema = pa.schema(
+            [
+                ("id", pa.int64()),
+                ("username", pa.string()),
+                ("exp", pa.int64()),
+                ("level", pa.int64()),
+                ("weeklyExp", pa.int64()),
+            ]
+        )
+        self.writer = pa.parquet.ParquetWriter(path, self.schema)
+
+    def write(self, rows: List[Dict]):
+        columns = [
+            [int(row["id"]) for row in rows],
+            [row["username"] for row in rows],
+            [int(row["exp"]) for row in rows],
+            [_optional_int(row.get("level")) for row in rows],
+            [_optional_int(row.get("weeklyExp")) for row in rows],
+        ]
+        self.writer.write_table(self.pa.Table.from_arrays(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {"ndjson": _NDJSONWriter, "csv": _CSVWriter, "parquet": _ParquetWriter}
+
+
+async def export_leaderboard(
+    client: AmariClient,
+    guild_id: int,
+    path: str,
+    /,
+    *,
+    format: Optional[str] = None,
+    weekly: bool = False,
+    page_size: int = 1000,
+) -> int:
+    """
+    Streams a guild's leaderboard to a file, one page at a time.
+
+    Only one page is held in memory while the previous one is written, so the memory
+    used does not grow with the size of the leaderboard. The pages are written to a
+    temporary file that replaces ``path`` once the export succeeds, so a failed export
+    leaves no partial file behind.
+
+    Parameters
+    ----------
+    client: AmariClient
+        The client used to fetch the leaderboard pages.
+    guild_id: int
+        The guild ID to export the leaderboard of.
+    path: str
+        The file to write to.
+    format: Optional[str]
+        Either ``"ndjson"``, ``"csv"`` or ``"parquet"``. Inferred from the file extension
+        when not given. Parquet files require ``pyarrow``.
+    weekly: bool
+        Choose either to export the weekly leaderboard or the regular leaderboard.
+    page_size: int
+        The amount of users to fetch per page.
+
+    Returns
+    -------
+    int
+        The number of users written.
+    """
+    writer = WRITERS[_resolve_format(path, format)]
+    directory, name = os.path.split(os.path.abspath(path))
+    temp_path = os.path.join(directory, f".{name}.{uuid.uuid4().hex}.tmp")
+    try:
+        written = await _export_pages(client, guild_id, temp_path, writer, weekly, page_size)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return written
+
+
+async def _export_pages(
+    client: AmariClient, guild_id: int, path: str, writer, weekly: bool, page_size: int
+) -> int:
+    writer = await asyncio.to_thread(writer, path)
+    lb_type = "weekly" if weekly else "leaderboard"
+
+    written = 0
+    write_task: Optional[asyncio.Future] = None
+    try:
+        page = 1
+        while True:
+            data = await client.request(
+                f"guild/{lb_type}/{guild_id}", params={"page": page, "limit": page_size}
+            )
+            rows = data["data"]
+            if write_task is not None:
+                await write_task
+            if rows:
+                write_task = asyncio.ensure_future(asyncio.to_thread(writer.write, rows))
+                written += len(rows)
+
+            total_count = data.get("total_count")
+            if len(rows) < page_size or (total_count is not None and written >= total_count):
+                break
+            page += 1
+
+        if write_task is not None:
+            await write_task
+    finally:
+        if write_task is not None and not write_task.done():
+            await asyncio.wait([write_task])
+        await asyncio.to_thread(writer.close)
+    return written
+
+
+async def export_leaderboards(
+    client: AmariClient,
+    guild_ids: Iterable[int],
+    directory: str,
+    /,
+    *,
+    format: str = "ndjson",
+    weekly: bool = False,
+    page_size: int = 1000,
+    concurrency: int = 4,
+) -> Dict[int, Union[int, Exception]]:
+    """
+    Streams the leaderboards of many guilds to files, concurrently.
+
+    Each leaderboard is written to ``<directory>/<guild_id>.<extension>``.
+
+    Parameters
+    ----------
+    client: AmariClient
+        The client used to fetch the leaderboard pages.
+    guild_ids: Iterable[int]
+        The guild IDs to export the leaderboards of.
+    directory: str
+        The directory to write the files to.
+    format: str
+        Either ``"ndjson"``, ``"csv"`` or ``"parquet"``.
+    weekly: bool
+        Choose either to export the weekly leaderboards or the regular leaderboards.
+    page_size: int
+        The amount of users to fetch per page.
+    concurrency: int
+        The maximum number of leaderboards exported at once.
+
+    Returns
+    -------
+    Dict[int, Union[int, Exception]]
+        The number of users written for each guild, or the error that stopped its export.
+    """
+    if format not in EXTENSIONS:
+        raise ValueError(f"unknown export format {format!r}")
+    semaphore = asyncio.Semaphore(concurrency)
+    guild_ids = list(dict.fromkeys(guild_ids))
+
+    async def export(guild_id: int) -> int:
+        async with semaphore:
+            path = os.path.join(directory, f"{guild_id}{EXTENSIONS[format]}")
+            return await export_leaderboard(
+                client, guild_id, path, format=format, weekly=weekly, page_size=page_size
+            )
+
+    results = await asyncio.gather(
+        *(export(guild_id) for guild_id in guild_ids), return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, BaseException) and not isinstance(result, Exception):
+            raise result
+    return dict(zip(guild_ids, results))
+
+
+def _read_columns(path: str, format: str) -> Tuple[List, ...]:
+    ids, names, exps, levels, weeklyexps = [], [], [], [], []
+    if format == "parquet":
+        table = _import_pyarrow().parquet.read_table(path)
+        return (
+            table.column("id").to_pylist(),
+            table.column("username").to_pylist(),
+            table.column("exp").to_pylist(),
+            table.column("level").to_pylist(),
+            table.column("weeklyExp").to_pylist(),
+        )
+
+    with open(path, encoding="utf-8", newline="") as file:
+        if format == "csv":
+            rows = csv.DictReader(file)
+        else:
+            rows = map(json.loads, file)
+        for row in rows:
+            ids.append(int(row["id"]))
+            names.append(row["username"])
+            exps.append(int(row["exp"]))
+            levels.append(_optional_int(row.get("level")))
+            weeklyexps.append(_optional_int(row.get("weeklyExp")))
+    return ids, names, exps, levels, weeklyexps
+
+
+def load_leaderboard(path: str, guild_id: int, /, *, format: Optional[str] = None) -> Leaderboard:
+    """
+    Loads a leaderboard written by :func:`export_leaderboard`.
+
+    Parameters
+    ----------
+    path: str
+        The exported file.
+    guild_id: int
+        The guild ID of the leaderboard.
+    format: Optional[str]
+        Either ``"ndjson"``, ``"csv"`` or ``"parquet"``. Inferred from the file extension
+        when not given.
+
+    Returns
+    -------
+    Leaderboard
+        The exported leaderboard.
+    """
+    columns = _read_columns(path, _resolve_format(path, format))
+    count = len(columns[0])
+    return Leaderboard._from_columns(guild_id, count, count, (*columns, list(range(count))))
@@ -0,0 +1,453 @@
+import functools
+import heapq
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Dict, Iterable, List, Mapping, Optional, Tuple
+
+__all__ = ("ExpHistory",)
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"AMRIEXP\x01"
+# A snapshot is a header followed by one sample per member.
+_HEADER = struct.Struct("<QqI4x")  # guild ID, timestamp, number of samples
+_SAMPLE = struct.Struct("<Qqq")  # user ID, exp, weekly exp
+
+
+def _locked(method):
+    # Queries hold the lock, so they never see a snapshot half added.
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+class _Series:
+    # The samples of one member. Values are stored as deltas from the previous sample,
+    # which fit in 32 bits, and only widened to 64 bits if a delta does not.
+    __slots__ = (
+        "snapshots",
+        "exp",
+        "weeklyexp",
+        "first_exp",
+        "first_weeklyexp",
+        "last_exp",
+        "last_weeklyexp",
+    )
+
+    def __init__(self, snapshot: int, exp: int, weeklyexp: int):
+        self.snapshots = array("I", (snapshot,))
+        self.exp = array("i", (0,))
+        self.weeklyexp = array("i", (0,))
+        self.first_exp = self.last_exp = exp
+        self.first_weeklyexp = self.last_weeklyexp = weeklyexp
+
+    def append(self, snapshot: int, exp: int, weeklyexp: int):
+        self.snapshots.append(snapshot)
+        try:
+            self.exp.append(exp - self.last_exp)
+        except OverflowError:
+            self.exp = array("q", self.exp)
+            self.exp.append(exp - self.last_exp)
+        try:
+            self.weeklyexp.append(weeklyexp - self.last_weeklyexp)
+        except OverflowError:
+            self.weeklyexp = array("q", self.weeklyexp)
+            self.weeklyexp.append(weeklyexp - self.last_weeklyexp)
+        self.last_exp = exp
+        self.last_weeklyexp = weeklyexp
+
+    def value_at(self, position: int, weekly: bool) -> int:
+        # Sums whichever side of the deltas is shorter.
+        if weekly:
+            deltas, first, last = self.weeklyexp, self.first_weeklyexp, self.last_weeklyexp
+        else:
+            deltas, first, last = self.exp, self.first_exp, self.last_exp
+        if position < len(deltas) // 2:
+            return first + sum(deltas[1 : position + 1])
+        return last - sum(deltas[position + 1 :])
+
+    def window(self, first: int, last: int) -> Optional[Tuple[int, int]]:
+        # The positions of the samples bounding the snapshots first..last.
+        end = bisect_right(self.snapshots, last) - 1
+        if end < 0:
+            return None
+        start = max(bisect_right(self.snapshots, first) - 1, 0)
+        if start > end:
+            return None
+        return start, end
+
+
+class _Guild:
+    __slots__ = ("times", "members")
+
+    def __init__(self):
+        self.times = array("q")
+        self.members: Dict[int, _Series] = {}
+
+    def snapshot_range(self, start: Optional[float], end: Optional[float]) -> Tuple[int, int]:
+        first = 0 if start is None else bisect_right(self.times, start) - 1
+        last = len(self.times) - 1 if end is None else bisect_right(self.times, end) - 1
+        return first, last
+
+
+class ExpHistory:
+    """
+    A local store of the exp of guild members over time.
+
+    Each leaderboard given to :meth:`record` is stored as a snapshot. Samples are kept per
+    guild and per member in compact delta encoded arrays, so range, rate and top gainer
+    queries only read the samples within the requested time range.
+
+    When a path is given, snapshots are also appended to that file and loaded back the next
+    time it is opened. The file is made of fixed-size little-endian records, so other tools
+    can memory-map it.
+
+    Snapshots given to :meth:`submit` are stored in a background thread, so recording
+    large leaderboards does not block the event loop. Queries can be made from any thread.
+    Pass it to :class:`AmariClient` as ``history`` to record every full regular
+    leaderboard fetched this way.
+
+    Attributes
+    ----------
+    path: Optional[str]
+        The file snapshots are appended to, if any.
+    min_interval: float
+        Snapshots of a guild taken less than this many seconds after its previous snapshot
+        are ignored, so cached leaderboards served many times are only stored once.
+    """
+
+    def __init__(self, path: Optional[str] = None, *, min_interval: float = 60):
+        self.path = path
+        self.min_interval = min_interval
+        self._guilds: Dict[int, _Guild] = {}
+        self._file: Optional[BinaryIO] = None
+        self._lock = threading.Lock()
+        # A single thread keeps the submitted snapshots in order.
+        self._worker = ThreadPoolExecutor(1, thread_name_prefix="amari-history")
+        if path is not None:
+            self._open(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _open(self, path: str):
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        with open(path, "a+b") as file:
+            if size:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    if data[: len(MAGIC)] != MAGIC:
+                        raise ValueError(f"{path!r} is not an exp history file")
+                    end = self._load(data)
+                if end < size:
+                    # Drop a snapshot left incomplete by an interrupted write.
+                    file.truncate(end)
+            else:
+                file.write(MAGIC)
+        self._file = open(path, "ab")
+
+    def _load(self, data: mmap.mmap) -> int:
+        offset = len(MAGIC)
+        while offset + _HEADER.size <= len(data):
+            guild_id, timestamp, count = _HEADER.unpack_from(data, offset)
+            end = offset + _HEADER.size + count * _SAMPLE.size
+            if end > len(data):
+                break
+            samples = _SAMPLE.iter_unpack(data[offset + _HEADER.size : end])
+            self._add(guild_id, timestamp, samples)
+            offset = end
+        return offset
+
+    def _add(self, guild_id: int, timestamp: int, samples: Iterable[Tuple[int, int, int]]):
+        guild = self._guilds.get(guild_id)
+        if guild is None:
+            guild = self._guilds[guild_id] = _Guild()
+        snapshot = len(guild.times)
+        guild.times.append(timestamp)
+        members = guild.members
+        for user_id, exp, weeklyexp in samples:
+            series = members.get(user_id)
+            if series is None:
+                members[user_id] = _Series(snapshot, exp, weeklyexp)
+            else:
+                series.append(snapshot, exp, weeklyexp)
+
+    def record(
+        self, guild_id: int, rows: Iterable[Mapping], *, timestamp: Optional[float] = None
+    ) -> bool:
+        """
+        Stores a snapshot of members' exp.
+
+        Parameters
+        ----------
+        guild_id: int
+            The guild ID.
+        rows: Iterable[Mapping]
+            The members, as leaderboard entries from the API. Members without a weekly exp
+            are stored with a weekly exp of 0.
+        timestamp: Optional[float]
+            When the snapshot was taken, as a Unix timestamp. Defaults to now. Timestamps
+            earlier than the guild's previous snapshot, for example after the clock was set
+            back, are moved forward to it.
+
+        Returns
+        -------
+        bool
+            Whether the snapshot was stored, rather than ignored because of
+            :attr:`min_interval`.
+        """
+        timestamp = int(time.time() if timestamp is None else timestamp)
+        with self._lock:
+            guild = self._guilds.get(guild_id)
+            if guild is not None and guild.times:
+                timestamp = max(timestamp, guild.times[-1])
+                if timestamp - guild.times[-1] < self.min_interval:
+                    return False
+
+            samples = [
+                (int(row["id"]), int(row["exp"]), int(row.get("weeklyExp") or 0))
+                for row in rows
+            ]
+            self._add(guild_id, timestamp, samples)
+            if self._file is not None:
+                self._write(guild_id, timestamp, samples)
+        return True
+
+    def submit(
+        self, guild_id: int, rows: Iterable[Mapping], *, timestamp: Optional[float] = None
+    ) -> Future:
+        """
+        Stores a snapshot of members' exp in a background thread.
+
+        Parameters are the same as :meth:`record`. The rows must not be modified until the
+        snapshot is stored.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to the result of :meth:`record`.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        return self._worker.submit(self.record, guild_id, rows, timestamp=timestamp)
+
+    def flush(self):
+        """Waits until the snapshots submitted so far are stored."""
+        self._worker.submit(int).result()
+
+    def _write(self, guild_id: int, timestamp: int, samples: List[Tuple[int, int, int]]):
+        try:
+            header = _HEADER.pack(guild_id, timestamp, len(samples))
+            self._file.write(header + b"".join(_SAMPLE.pack(*sample) for sample in samples))
+            self._file.flush()
+        except Exception:
+            logger.exception(f"Failed to write a snapshot of guild {guild_id} to {self.path!r}.")
+
+    @_locked
+    def samples(
+        self,
+        guild_id: int,
+        user_id: int,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        *,
+        weekly: bool = False,
+    ) -> List[Tuple[int, int]]:
+        """
+        Get a member's exp samples within a time range.
+
+        Parameters
+        ----------
+        guild_id: int
+            The guild ID.
+        user_id: int
+            The member's ID.
+        start: Optional[float]
+            The start of the range, as a Unix timestamp. ``None`` starts at the first sample.
+        end: Optional[float]
+            The end of the range, as a Unix timestamp. ``None`` ends at the last sample.
+        weekly: bool
+            Whether to get the weekly exp rather than the exp.
+
+        Returns
+        -------
+        List[Tuple[int, int]]
+            The ``(timestamp, exp)`` samples, oldest first.
+        """
+        guild = self._guilds.get(guild_id)
+        series = guild.members.get(user_id) if guild is not None else None
+        if series is None:
+            return []
+        first = 0 if start is None else bisect_left(guild.times, start)
+        _, last = guild.snapshot_range(None, end)
+        begin = bisect_left(series.snapshots, first)
+        stop = bisect_right(series.snapshots, last)
+        if begin >= stop:
+            return []
+
+        deltas = series.weeklyexp if weekly else series.exp
+        value = series.value_at(begin, weekly)
+        samples = [(guild.times[series.snapshots[begin]], value)]
+        for position in range(begin + 1, stop):
+            value += deltas[position]
+            samples.append((guild.times[series.snapshots[position]], value))
+        return samples
+
+    @_locked
+    def gain(
+        self,
+        guild_id: int,
+        user_id: int,
+        start: float,
+        end: Optional[float] = None,
+        *,
+        weekly: bool = False,
+    ) -> Optional[int]:
+        """
+        Get the exp a member gained within a time range.
+
+        The gain is measured between the last samples taken at or before ``start`` and
+        ``end``, or from the member's first sample if they were first seen after ``start``.
+
+        Parameters
+        ----------
+        guild_id: int
+            The guild ID.
+        user_id: int
+            The member's ID.
+        start: float
+            The start of the range, as a Unix timestamp.
+        end: Optional[float]
+            The end of the range, as a Unix timestamp. ``None`` ends at the last sample.
+        weekly: bool
+            Whether to measure the weekly exp rather than the exp.
+
+        Returns
+        -------
+        Optional[int]
+            The exp gained, or ``None`` if the member has no samples in the range.
+        """
+        guild = self._guilds.get(guild_id)
+        series = guild.members.get(user_id) if guild is not None else None
+        if series is None:
+            return None
+        window = series.window(*guild.snapshot_range(start, end))
+        if window is None:
+            return None
+        deltas = series.weeklyexp if weekly else series.exp
+        return sum(deltas[window[0] + 1 : window[1] + 1])
+
+    @_locked
+    def rate(
+        self,
+        guild_id: int,
+        user_id: int,
+        start: float,
+        end: Optional[float] = None,
+        *,
+        weekly: bool = False,
+        per: float = 3600,
+    ) -> Optional[float]:
+        """
+        Get the average rate at which a member gained exp within a time range.
+
+        The range is bounded by samples as in :meth:`gain`.
+
+        Parameters
+        ----------
+        guild_id: int
+            The guild ID.
+        user_id: int
+            The member's ID.
+        start: float
+            The start of the range, as a Unix timestamp.
+        end: Optional[float]
+            The end of the range, as a Unix timestamp. ``None`` ends at the last sample.
+        weekly: bool
+            Whether to measure the weekly exp rather than the exp.
+        per: float
+            The period of the rate, in seconds. Defaults to an hour.
+
+        Returns
+        -------
+        Optional[float]
+            The exp gained per period, or ``None`` if fewer than two samples bound the range.
+        """
+        guild = self._guilds.get(guild_id)
+        series = guild.members.get(user_id) if guild is not None else None
+        if series is None:
+            return None
+        window = series.window(*guild.snapshot_range(start, end))
+        if window is None:
+            return None
+        first, last = window
+        elapsed = guild.times[series.snapshots[last]] - guild.times[series.snapshots[first]]
+        if elapsed <= 0:
+            return None
+        deltas = series.weeklyexp if weekly else series.exp
+        return sum(deltas[first + 1 : last + 1]) * per / elapsed
+
+    @_locked
+    def top_gainers(
+        self,
+        guild_id: int,
+        start: float,
+        end: Optional[float] = None,
+        *,
+        weekly: bool = False,
+        limit: int = 10,
+    ) -> List[Tuple[int, int]]:
+        """
+        Get the members who gained the most exp within a time range.
+
+        Gains are measured as in :meth:`gain`.
+
+        Parameters
+        ----------
+        guild_id: int
+            The guild ID.
+        start: float
+            The start of the range, as a Unix timestamp.
+        end: Optional[float]
+            The end of the range, as a Unix timestamp. ``None`` ends at the last sample.
+        weekly: bool
+            Whether to measure the weekly exp rather than the exp.
+        limit: int
+            The number of members to return.
+
+        Returns
+        -------
+        List[Tuple[int, int]]
+            The ``(user_id, gain)`` pairs of the top members, largest gain first.
+        """
+        guild = self._guilds.get(guild_id)
+        if guild is None:
+            return []
+        first, last = guild.snapshot_range(start, end)
+
+        def gains():
+            for user_id, series in guild.members.items():
+                window = series.window(first, last)
+                if window is not None:
+                    deltas = series.weeklyexp if weekly else series.exp
+                    yield user_id, sum(deltas[window[0] + 1 : window[1] + 1])
+
+        return heapq.nlargest(limit, gains(), key=lambda item: item[1])
+
+    def close(self):
+        """Stores the submitted snapshots and closes the history file, if any."""
+        self._worker.shutdown()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -1,8 +1,71 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Iterator, Optional, Tuple
-
-__all__ = ("User", "Users", "Leaderboard", "RewardRole", "Rewards")
+import weakref
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, TypeVar, Union
+
+__all__ = (
+    "User",
+    "Users",
+    "Leaderboard",
+    "RewardRole",
+    "Rewards",
+    "FrozenUsers",
+    "FrozenLeaderboard",
+    "FrozenRewards",
+    "CombinedUser",
+    "CombinedLeaderboard",
+    "BulkResult",
+)
+
+T = TypeVar("T")
+
+
+def _ref(obj: Optional[T]) -> Optional[weakref.ReferenceType[T]]:
+    # Parents are referenced weakly so collections are freed by refcounting
+    # instead of being left to the cyclic garbage collector.
+    return weakref.ref(obj) if obj is not None else None
+
+
+def _deref(ref: Optional[weakref.ReferenceType[T]]) -> Optional[T]:
+    return ref() if ref is not None else None
+
+
+def _optional_int(value: Any) -> Optional[int]:
+    return int(value) if value is not None else None
+
+
+def _to_columns(users: Iterable[User]) -> Tuple[List, ...]:
+    columns = ([], [], [], [], [], [])
+    for user in users:
+        columns[0].append(user.user_id)
+        columns[1].append(user.name)
+        columns[2].append(user.exp)
+        columns[3].append(user.level)
+        columns[4].append(user.weeklyexp)
+        columns[5].append(user.position)
+    return columns
+
+
+def _users_from_columns(
+    guild_id: int, columns: Tuple[List, ...], leaderboard: Optional[Leaderboard] = None
+) -> Dict[int, User]:
+    # Skips the parsing done in User.__init__, as the values were already converted.
+    new = User.__new__
+    leaderboard = _ref(leaderboard)
+    users = {}
+    for user_id, name, exp, level, weeklyexp, position in zip(*columns):
+        user = new(User)
+        user.guild_id = guild_id
+        user.user_id = user_id
+        user.name = name
+        user.exp = exp
+        user.level = level
+        user.weeklyexp = weeklyexp
+        user.position = position
+        user._leaderboard = leaderboard
+        users[user_id] = user
+    return users
 
 
 class _SlotsReprMixin:
@@ -45,6 +108,7 @@ class User(_SlotsReprMixin):
         The user's position in the leaderboard.
     leaderboard: Optional[Leaderboard]
         The leaderboard object the user is in, if a leaderboard endpoint was fetched.
+        The leaderboard is weakly referenced, so this is ``None`` once it is no longer used.
     """
 
     __slots__ = (
@@ -55,7 +119,7 @@ class User(_SlotsReprMixin):
         "level",
         "weeklyexp",
         "position",
-        "leaderboard",
+        "_leaderboard",
     )
 
     def __init__(
@@ -75,7 +139,21 @@ class User(_SlotsReprMixin):
             int(data.get("weeklyExp")) if data.get("weeklyExp") is not None else None
         )
         self.position: Optional[int] = position
-        self.leaderboard: Optional[Leaderboard] = leaderboard
+        self._leaderboard = _ref(leaderboard)
+
+    def __getstate__(self):
+        # Weak references cannot be pickled, and the leaderboard is not kept alive by its users.
+        slots = {slot: getattr(self, slot) for slot in self.__slots__}
+        slots["_leaderboard"] = None
+        return None, slots
+
+    @property
+    def leaderboard(self) -> Optional[Leaderboard]:
+        return _deref(self._leaderboard)
+
+    @leaderboard.setter
+    def leaderboard(self, leaderboard: Optional[Leaderboard]):
+        self._leaderboard = _ref(leaderboard)
 
 
 class Users:
@@ -94,7 +172,7 @@ class Users:
         The amount of users requested.
     """
 
-    __slots__ = ("guild_id", "users", "total_members", "queried_members")
+    __slots__ = ("guild_id", "users", "total_members", "queried_members", "__weakref__")
 
     def __init__(self, guild_id: int, data: dict):
         self.guild_id: int = guild_id
@@ -107,6 +185,24 @@ class Users:
     def __repr__(self) -> str:
         return f"<Users guild_id={self.guild_id} user_count={self.total_members}>"
 
+    def __reduce__(self):
+        # Pickle users as columns, which is far smaller and faster than pickling each User.
+        return (
+            self._from_columns,
+            (self.guild_id, self.total_members, self.queried_members, _to_columns(self)),
+        )
+
+    @classmethod
+    def _from_columns(
+        cls, guild_id: int, total_members: int, queried_members: int, columns: Tuple[List, ...]
+    ) -> Users:
+        self = cls.__new__(cls)
+        self.guild_id = guild_id
+        self.total_members = total_members
+        self.queried_members = queried_members
+        self.users = _users_from_columns(guild_id, columns)
+        return self
+
     def __len__(self) -> int:
         return self.total_members
 
@@ -163,7 +259,7 @@ class Leaderboard:
         The users in the leaderboard.
     """
 
-    __slots__ = ("guild_id", "user_count", "total_count", "users")
+    __slots__ = ("guild_id", "user_count", "total_count", "users", "__weakref__")
 
     def __init__(self, guild_id: int, data: dict):
         self.guild_id: int = guild_id
@@ -177,6 +273,28 @@ class Leaderboard:
     def __repr__(self) -> str:
         return f"<Leaderboard guild_id={self.guild_id} user_count={self.user_count}>"
 
+    def __reduce__(self):
+        # Pickle users as columns, which is far smaller and faster than pickling each User.
+        return (
+            self._from_columns,
+            (self.guild_id, self.user_count, self.total_count, _to_columns(self)),
+        )
+
+    @classmethod
+    def _from_columns(
+        cls,
+        guild_id: int,
+        user_count: int,
+        total_count: Optional[int],
+        columns: Tuple[List, ...],
+    ) -> Leaderboard:
+        self = cls.__new__(cls)
+        self.guild_id = guild_id
+        self.user_count = user_count
+        self.total_count = total_count
+        self.users = _users_from_columns(guild_id, columns, self)
+        return self
+
     def __len__(self) -> int:
         return self.user_count
 
@@ -227,16 +345,28 @@ class RewardRole(_SlotsReprMixin):
         The role's ID.
     level: int
         The level that a user needs for the role to be awarded to them.
-    rewards: Rewards
+    rewards: Optional[Rewards]
         The rewards object this role belongs to.
+        The rewards are weakly referenced, so this is ``None`` once they are no longer used.
     """
 
-    __slots__ = ("role_id", "level", "rewards")
+    __slots__ = ("role_id", "level", "_rewards")
 
-    def __init__(self, role_id: int, level: int, rewards: Rewards):
+    def __init__(self, role_id: int, level: int, rewards: Optional[Rewards]):
         self.role_id: int = role_id
         self.level: int = level
-        self.rewards: Rewards = rewards
+        self._rewards = _ref(rewards)
+
+    def __getstate__(self):
+        return None, {"role_id": self.role_id, "level": self.level, "_rewards": None}
+
+    @property
+    def rewards(self) -> Optional[Rewards]:
+        return _deref(self._rewards)
+
+    @rewards.setter
+    def rewards(self, rewards: Optional[Rewards]):
+        self._rewards = _ref(rewards)
 
 
 class Rewards:
@@ -253,7 +383,7 @@ class Rewards:
         The guild's reward roles.
     """
 
-    __slots__ = ("guild_id", "reward_count", "roles")
+    __slots__ = ("guild_id", "reward_count", "roles", "__weakref__")
 
     def __init__(self, guild_id: int, data: dict):
         self.guild_id: int = guild_id
@@ -266,6 +396,20 @@ class Rewards:
     def __repr__(self) -> str:
         return f"<Rewards guild_id={self.guild_id} reward_count={self.reward_count}>"
 
+    def __reduce__(self):
+        roles = [(role.role_id, role.level) for role in self.roles.values()]
+        return self._from_roles, (self.guild_id, self.reward_count, roles)
+
+    @classmethod
+    def _from_roles(
+        cls, guild_id: int, reward_count: int, roles: List[Tuple[int, int]]
+    ) -> Rewards:
+        self = cls.__new__(cls)
+        self.guild_id = guild_id
+        self.reward_count = reward_count
+        self.roles = {role_id: RewardRole(role_id, level, self) for role_id, level in roles}
+        return self
+
     def __len__(self) -> int:
         return self.reward_count
 
@@ -287,3 +431,390 @@ class Rewards:
             The role, if found in the rewards.
         """
         return self.roles.get(role_id)
+
+
+class _FrozenMixin:
+    # Shared by the frozen collections. Subclasses define _items, _sorted, _sort_keys
+    # and _source slots, and call _freeze once their mapping is built.
+    __slots__ = ()
+
+    _sort_keys: Tuple[str, ...] = ()
+    _sort_reverse: bool = True
+
+    def _freeze(self, mapping: Dict[int, Any]) -> Mapping[int, Any]:
+        self._items = tuple(mapping.values())
+        self._sorted = {}
+        self._source = None
+        return MappingProxyType(mapping)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._items)
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        return self._items[index]
+
+    def sorted_by(self, key: str, /) -> Tuple[Any, ...]:
+        """
+        Get the items sorted by an attribute.
+
+        The sorted view is computed once and then shared by every caller.
+
+        Parameters
+        ----------
+        key: str
+            The attribute to sort by.
+
+        Returns
+        -------
+        Tuple
+            The sorted items. Users are sorted highest first, reward roles lowest first.
+            Missing values are sorted as 0.
+        """
+        view = self._sorted.get(key)
+        if view is None:
+            if key not in self._sort_keys:
+                raise ValueError(f"cannot sort by {key!r}, expected one of {self._sort_keys}")
+            view = tuple(
+                sorted(
+                    self._items,
+                    key=lambda item: getattr(item, key) or 0,
+                    reverse=self._sort_reverse,
+                )
+            )
+            self._sorted[key] = view
+        return view
+
+    def top(self, count: int, /, *, by: str = "exp") -> Tuple[Any, ...]:
+        """
+        Get the first items of a sorted view.
+
+        Parameters
+        ----------
+        count: int
+            The number of items to get.
+        by: str
+            The attribute to sort by.
+
+        Returns
+        -------
+        Tuple
+            The first ``count`` items of :meth:`sorted_by`.
+        """
+        return self.sorted_by(by)[:count]
+
+    def _frozen(self, *args):
+        raise TypeError(f"{self.__class__.__name__} is frozen and cannot be modified")
+
+
+class FrozenUsers(_FrozenMixin, Users):
+    """
+    An immutable :class:`Users` snapshot.
+
+    Iterating does not copy the users, so a snapshot can be shared by any number of
+    concurrent readers. Users can be indexed or sliced in their original order.
+    Sorted views by ``exp``, ``weeklyexp`` and ``level`` are cached.
+
+    Attributes
+    ----------
+    users: Mapping[int, User]
+        A read-only mapping of the users.
+    """
+
+    __slots__ = ("_items", "_sorted", "_source")
+
+    _sort_keys = ("exp", "weeklyexp", "level")
+
+    def __init__(self, guild_id: int, data: dict):
+        super().__init__(guild_id, data)
+        self.users = self._freeze(self.users)
+
+    @classmethod
+    def _from_columns(cls, *args) -> FrozenUsers:
+        self = super()._from_columns(*args)
+        self.users = self._freeze(self.users)
+        return self
+
+    add_user = _FrozenMixin._frozen
+
+
+class FrozenLeaderboard(_FrozenMixin, Leaderboard):
+    """
+    An immutable :class:`Leaderboard` snapshot.
+
+    Iterating does not copy the users, so a snapshot can be shared by any number of
+    concurrent readers. Users can be indexed or sliced by position.
+    Sorted views by ``exp``, ``weeklyexp`` and ``level`` are cached.
+
+    Attributes
+    ----------
+    users: Mapping[int, User]
+        A read-only mapping of the users in the leaderboard.
+    """
+
+    __slots__ = ("_items", "_sorted", "_source")
+
+    _sort_keys = ("exp", "weeklyexp", "level")
+
+    def __init__(self, guild_id: int, data: dict):
+        super().__init__(guild_id, data)
+        self.users = self._freeze(self.users)
+
+    @classmethod
+    def _from_columns(cls, *args) -> FrozenLeaderboard:
+        self = super()._from_columns(*args)
+        self.users = self._freeze(self.users)
+        return self
+
+    add_user = _FrozenMixin._frozen
+
+
+class FrozenRewards(_FrozenMixin, Rewards):
+    """
+    An immutable :class:`Rewards` snapshot.
+
+    Iterating does not copy the roles, so a snapshot can be shared by any number of
+    concurrent readers. Roles can be indexed or sliced in their original order,
+    and the view sorted by ``level`` is cached.
+
+    Attributes
+    ----------
+    roles: Mapping[int, RewardRole]
+        A read-only mapping of the guild's reward roles.
+    """
+
+    __slots__ = ("_items", "_sorted", "_source")
+
+    _sort_keys = ("level",)
+    _sort_reverse = False
+
+    def __init__(self, guild_id: int, data: dict):
+        super().__init__(guild_id, data)
+        self.roles = self._freeze(self.roles)
+
+    @classmethod
+    def _from_roles(cls, *args) -> FrozenRewards:
+        self = super()._from_roles(*args)
+        self.roles = self._freeze(self.roles)
+        return self
+
+    def top(self, count: int, /, *, by: str = "level") -> Tuple[RewardRole, ...]:
+        return super().top(count, by=by)
+
+
+class CombinedUser(_SlotsReprMixin):
+    """
+    A user's standing in both the regular and the weekly leaderboard of a guild.
+
+    Attributes
+    ----------
+    guild_id: int
+        The user's guild ID.
+    user_id: int
+        The user's ID.
+    name: str
+        The user's Discord username. This may not be up to date.
+    exp: Optional[int]
+        The user's experience points.
+    level: Optional[int]
+        The user's level.
+    weeklyexp: Optional[int]
+        The user's weekly experience points.
+    position: Optional[int]
+        The user's position in the regular leaderboard, if they are in it.
+    weekly_position: Optional[int]
+        The user's position in the weekly leaderboard, if they are in it.
+    """
+
+    __slots__ = (
+        "guild_id",
+        "user_id",
+        "name",
+        "exp",
+        "level",
+        "weeklyexp",
+        "position",
+        "weekly_position",
+    )
+
+
+class CombinedLeaderboard:
+    """
+    A guild's regular and weekly leaderboards, aligned into a single index of users.
+
+    Users are stored in columns once, so looking up a user's standing in both
+    leaderboards is a single dictionary lookup, and both orders are kept for
+    sorted views. :class:`CombinedUser` objects are created when accessed.
+
+    Attributes
+    ----------
+    guild_id: int
+        The guild ID.
+    user_count: int
+        The number of users in the regular leaderboard.
+    weekly_user_count: int
+        The number of users in the weekly leaderboard.
+    """
+
+    __slots__ = (
+        "guild_id",
+        "user_count",
+        "weekly_user_count",
+        "_index",
+        "_columns",
+        "_weekly_order",
+        "_source",
+        "__weakref__",
+    )
+
+    def __init__(self, guild_id: int, data: dict, weekly_data: dict):
+        self.guild_id: int = guild_id
+        rows = data["data"]
+        weekly_rows = weekly_data["data"]
+        self.user_count: int = len(rows)
+        self.weekly_user_count: int = len(weekly_rows)
+
+        ids, names, exps, levels, weeklyexps, positions, weekly_positions = self._columns = (
+            [int(row["id"]) for row in rows],
+            [row["username"] for row in rows],
+            [int(row["exp"]) for row in rows],
+            [row.get("level") for row in rows],
+            [_optional_int(row.get("weeklyExp")) for row in rows],
+            list(range(len(rows))),
+            [None] * len(rows),
+        )
+        index = self._index = dict(zip(ids, range(len(ids))))
+
+        weekly_order = self._weekly_order = []
+        for weekly_position, row in enumerate(weekly_rows):
+            user_id = int(row["id"])
+            # The weekly leaderboard lists weekly exp as exp when weeklyExp is not given.
+            weeklyexp = int(row.get("weeklyExp", row["exp"]))
+            i = index.get(user_id)
+            if i is None:
+                i = index[user_id] = len(ids)
+                ids.append(user_id)
+                names.append(row["username"])
+                exps.append(int(row["exp"]) if "weeklyExp" in row else None)
+                levels.append(row.get("level"))
+                weeklyexps.append(weeklyexp)
+                positions.append(None)
+                weekly_positions.append(weekly_position)
+            else:
+                weeklyexps[i] = weeklyexp
+                weekly_positions[i] = weekly_position
+            weekly_order.append(i)
+
+    def __repr__(self) -> str:
+        return (
+            f"<CombinedLeaderboard guild_id={self.guild_id} user_count={self.user_count} "
+            f"weekly_user_count={self.weekly_user_count}>"
+        )
+
+    def __getstate__(self):
+        # The API data kept to share cached snapshots is not pickled.
+        slots = self.__slots__[:-2]
+        return None, {slot: getattr(self, slot) for slot in slots}
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._index
+
+    def __iter__(self) -> Iterator[CombinedUser]:
+        return map(self._user, range(len(self._index)))
+
+    def _user(self, i: int) -> CombinedUser:
+        columns = self._columns
+        user = CombinedUser.__new__(CombinedUser)
+        user.guild_id = self.guild_id
+        user.user_id = columns[0][i]
+        user.name = columns[1][i]
+        user.exp = columns[2][i]
+        user.level = columns[3][i]
+        user.weeklyexp = columns[4][i]
+        user.position = columns[5][i]
+        user.weekly_position = columns[6][i]
+        return user
+
+    def get_user(self, user_id: int, /) -> Optional[CombinedUser]:
+        """
+        Get a user's standing in both leaderboards.
+
+        Parameters
+        ----------
+        user_id: int
+            The user's ID.
+
+        Returns
+        -------
+        Optional[CombinedUser]
+            The user, if found in either leaderboard.
+        """
+        i = self._index.get(user_id)
+        return self._user(i) if i is not None else None
+
+    def sorted_by(self, *, weekly: bool = False) -> List[CombinedUser]:
+        """
+        Get the users in the order of one of the leaderboards.
+
+        Parameters
+        ----------
+        weekly: bool
+            Whether to use the order of the weekly leaderboard rather than the regular one.
+
+        Returns
+        -------
+        List[CombinedUser]
+            The users of that leaderboard, best first.
+        """
+        order = self._weekly_order if weekly else range(self.user_count)
+        return [self._user(i) for i in order]
+
+    def top(self, count: int, /, *, weekly: bool = False) -> List[CombinedUser]:
+        """
+        Get the best users of one of the leaderboards.
+
+        Parameters
+        ----------
+        count: int
+            The number of users to return.
+        weekly: bool
+            Whether to use the weekly leaderboard rather than the regular one.
+
+        Returns
+        -------
+        List[CombinedUser]
+            The users, best first.
+        """
+        order = self._weekly_order if weekly else range(self.user_count)
+        return [self._user(i) for i in order[:count]]
+
+
+class BulkResult(_SlotsReprMixin):
+    """
+    The result for one guild of a bulk fetch.
+
+    Attributes
+    ----------
+    guild_id: int
+        The guild ID.
+    result: Optional[Any]
+        The fetched object, if the fetch succeeded.
+    error: Optional[Exception]
+        The error raised for this guild, if the fetch failed.
+    """
+
+    __slots__ = ("guild_id", "result", "error")
+
+    def __init__(
+        self, guild_id: int, result: Optional[Any] = None, error: Optional[Exception] = None
+    ):
+        self.guild_id: int = guild_id
+        self.result: Optional[Any] = result
+        self.error: Optional[Exception] = error
+
+    @property
+    def ok(self) -> bool:
+        """Whether the fetch succeeded."""
+        return self.error is None
@@ -0,0 +1,125 @@
+import asyncio
+import json
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Optional, Type, TypeVar
+
+__all__ = ("PayloadOffloader",)
+
+T = TypeVar("T")
+
+
+def _decode(body: bytes) -> Any:
+    return json.loads(body)
+
+
+def _build(cls: Type[T], guild_id: int, data: dict) -> T:
+    return cls(guild_id, data)
+
+
+def _load(cls: Type[T], guild_id: int, body: bytes) -> T:
+    return _build(cls, guild_id, _decode(body))
+
+
+class PayloadOffloader:
+    """
+    Runs the decoding and object construction of large payloads outside the event loop.
+
+    Small payloads are still handled inline, as handing them to an executor costs more
+    than processing them.
+
+    Responses that are not cached are decoded and built in one executor call by
+    :meth:`load`. With a :class:`concurrent.futures.ProcessPoolExecutor`, only the built
+    object is sent back, in a compact columnar form that is cheaper to unpickle than the
+    JSON is to decode and build.
+
+    The decoded data of cached responses is needed by the event loop, so it is sent back
+    by :meth:`decode`, and :meth:`build` then runs in the event loop's default thread
+    pool rather than the process pool, which would pickle the data a second time.
+
+    Attributes
+    ----------
+    executor: Optional[concurrent.futures.Executor]
+        The thread or process pool to use. ``None`` uses the event loop's default executor.
+    threshold: int
+        Response bodies of at least this many bytes are decoded in the executor.
+    row_threshold: int
+        Leaderboards and users with at least this many entries are built in the executor.
+    """
+
+    def __init__(
+        self,
+        executor: Optional[Executor] = None,
+        *,
+        threshold: int = 256 * 1024,  # 256 KiB
+        row_threshold: int = 2500,
+    ):
+        self.executor = executor
+        self.threshold = threshold
+        self.row_threshold = row_threshold
+
+    async def decode(self, body: bytes) -> Any:
+        """
+        Decodes a JSON response body.
+
+        Parameters
+        ----------
+        body: bytes
+            The raw response body.
+
+        Returns
+        -------
+        Any
+            The decoded JSON data.
+        """
+        if len(body) < self.threshold:
+            return _decode(body)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, _decode, body)
+
+    async def build(self, cls: Type[T], guild_id: int, data: dict) -> T:
+        """
+        Builds an object from decoded API data.
+
+        Parameters
+        ----------
+        cls: Type[T]
+            The object class, for example :class:`Leaderboard`.
+        guild_id: int
+            The guild ID passed to the class.
+        data: dict
+            The decoded API data passed to the class.
+
+        Returns
+        -------
+        T
+            The built object.
+        """
+        rows = data.get("data", data.get("members", ()))
+        if len(rows) < self.row_threshold:
+            return _build(cls, guild_id, data)
+        executor = None if isinstance(self.executor, ProcessPoolExecutor) else self.executor
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, _build, cls, guild_id, data)
+
+    async def load(self, cls: Type[T], guild_id: int, body: bytes) -> T:
+        """
+        Decodes a JSON response body and builds an object from it.
+
+        Parameters
+        ----------
+        cls: Type[T]
+            The object class, for example :class:`Leaderboard`.
+        guild_id: int
+            The guild ID passed to the class.
+        body: bytes
+            The raw response body.
+
+        Returns
+        -------
+        T
+            The built object.
+        """
+        if len(body) < self.threshold:
+            return await self.build(cls, guild_id, _decode(body))
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, _load, cls, guild_id, body)
@@ -0,0 +1,305 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, List, Mapping, Optional, Tuple, Union
+
+from .cache import CacheBackend, CacheEntry
+from .exceptions import CacheError, NotFound
+
+__all__ = ("RedisCache",)
+
+
+def _encode_command(*args: Union[str, int, bytes]) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, int):
+            arg = str(arg)
+        if isinstance(arg, str):
+            arg = arg.encode("utf-8")
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+async def _read_reply(reader: asyncio.StreamReader) -> Any:
+    line = await reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("the Redis server closed the connection")
+    kind, value = line[:1], line[1:-2]
+    if kind == b"+":
+        return value.decode("utf-8")
+    if kind == b"-":
+        # Returned rather than raised, so the other replies of a pipeline are still read.
+        return CacheError(value.decode("utf-8"))
+    if kind == b":":
+        return int(value)
+    if kind == b"$":
+        length = int(value)
+        if length == -1:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        length = int(value)
+        if length == -1:
+            return None
+        return [await _read_reply(reader) for _ in range(length)]
+    raise CacheError(f"unexpected reply from the Redis server: {line!r}")
+
+
+def _digest(body: bytes) -> bytes:
+    return hashlib.blake2b(body, digest_size=16).digest()
+
+
+class RedisCache(CacheBackend):
+    """
+    A cache stored in a Redis server, shared by every client connected to it.
+
+    Use it to share one warm cache between many worker processes or machines. It speaks
+    the Redis protocol directly, so any server compatible with it works and no Redis
+    library is needed. Entries expire in Redis itself, so size limits are set with the
+    server's ``maxmemory`` option.
+
+    .. code:: py
+
+        cache = amari.RedisCache("localhost", 6379, ttl=60)
+        client = amari.AmariClient(token, cache_backend=cache)
+
+    Attributes
+    ----------
+    host: str
+        The Redis server's host.
+    port: int
+        The Redis server's port.
+    db: int
+        The Redis database to use.
+    password: Optional[str]
+        The password to authenticate with, if the server requires one.
+    ttl: float
+        Time to live for cache entries, in seconds.
+    stale_ttl: float
+        How long expired entries with an ETag or Last-Modified validator are kept
+        for revalidation, in seconds.
+    prefix: str
+        The prefix of every key stored by the cache.
+    decoded_entries: int
+        How many decoded bodies are kept in memory. A body read again unchanged is not
+        decoded twice, and the same object is returned, so frozen snapshots built from it
+        are shared like with :class:`Cache`.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        *,
+        db: int = 0,
+        password: Optional[str] = None,
+        ttl: float = 60,
+        stale_ttl: float = 300,
+        prefix: str = "amari:",
+        decoded_entries: int = 64,
+    ):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.prefix = prefix
+        self.decoded_entries = decoded_entries
+        self.lock = asyncio.Lock()
+        self._decoded: OrderedDict[str, Tuple[bytes, Any]] = OrderedDict()
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        commands = []
+        if self.password is not None:
+            commands.append(("AUTH", self.password))
+        if self.db:
+            commands.append(("SELECT", self.db))
+        if commands:
+            await self._send(commands)
+
+    def _disconnect(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def _send(self, commands: List[Tuple]) -> List[Any]:
+        # Commands are pipelined: all are written before the replies are read.
+        self._writer.write(b"".join(_encode_command(*command) for command in commands))
+        await self._writer.drain()
+        replies = [await _read_reply(self._reader) for _ in commands]
+        for reply in replies:
+            if isinstance(reply, CacheError):
+                raise reply
+        return replies
+
+    async def _execute(self, *commands: Tuple) -> List[Any]:
+        async with self.lock:
+            try:
+                if self._writer is None or self._writer.is_closing():
+                    await self._connect()
+                return await self._send(list(commands))
+            except BaseException:
+                # The connection may be left in the middle of a reply, or without its
+                # AUTH or SELECT applied, so it cannot be reused.
+                self._disconnect()
+                raise
+
+    def _key(self, key: Tuple) -> str:
+        return self.prefix + ":".join(map(str, key))
+
+    def _meta(
+        self,
+        timestamp: float,
+        ttl: float,
+        not_found: Optional[str] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> Tuple[str, int]:
+        meta = {"timestamp": timestamp, "ttl": ttl}
+        if not_found is not None:
+            meta["not_found"] = not_found
+        keep = ttl
+        if etag is not None or last_modified is not None:
+            meta["etag"] = etag
+            meta["last_modified"] = last_modified
+            keep += self.stale_ttl
+        return json.dumps(meta, separators=(",", ":")), max(int(keep * 1000), 1)
+
+    def _set_commands(
+        self,
+        key: Tuple,
+        data: Any,
+        ttl: Optional[float],
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> List[Tuple]:
+        # Each entry is a hash holding the response body and a small "meta" field, so
+        # freshness is checked and TTLs are restarted without touching the body.
+        ttl = self.ttl if ttl is None else ttl
+        if isinstance(data, NotFound):
+            not_found, body = str(data).partition(": ")[2] or "", "null"
+        elif isinstance(data, BaseException):
+            raise TypeError(f"cannot cache {type(data).__name__} errors")
+        else:
+            not_found, body = None, json.dumps(data, separators=(",", ":"))
+        meta, expires = self._meta(time.time(), ttl, not_found, etag, last_modified)
+        name = self._key(key)
+        if not_found is None:
+            self._remember(name, _digest(body.encode("utf-8")), data)
+        else:
+            self._decoded.pop(name, None)
+        return [("HSET", name, "meta", meta, "body", body), ("PEXPIRE", name, expires)]
+
+    def _remember(self, name: str, digest: bytes, data: Any):
+        if self.decoded_entries > 0:
+            self._decoded[name] = (digest, data)
+            self._decoded.move_to_end(name)
+            if len(self._decoded) > self.decoded_entries:
+                self._decoded.popitem(last=False)
+
+    def _decode(self, name: str, body: bytes) -> Any:
+        # Bodies are compared by digest, which is much cheaper than decoding them again.
+        digest = _digest(body)
+        decoded = self._decoded.get(name)
+        if decoded is not None and decoded[0] == digest:
+            self._decoded.move_to_end(name)
+            return decoded[1]
+        data = json.loads(body)
+        self._remember(name, digest, data)
+        return data
+
+    def _load(self, name: str, meta: dict, body: bytes) -> CacheEntry:
+        if "not_found" in meta:
+            data = NotFound(None, meta["not_found"] or None)
+        else:
+            data = self._decode(name, body)
+        return CacheEntry(
+            data,
+            meta["timestamp"],
+            len(body),
+            meta["ttl"],
+            meta.get("etag"),
+            meta.get("last_modified"),
+        )
+
+    def _fresh(self, name: str, reply: List[Optional[bytes]]) -> Optional[Any]:
+        meta, body = reply
+        # A hash without a body was recreated by a touch racing its expiry.
+        if meta is None or body is None:
+            return None
+        meta = json.loads(meta)
+        # Stale entries are skipped before their body is decoded.
+        if time.time() - meta["timestamp"] >= meta["ttl"]:
+            return None
+        return self._load(name, meta, body).data
+
+    async def get(self, key: Tuple) -> Optional[Any]:
+        name = self._key(key)
+        (reply,) = await self._execute(("HMGET", name, "meta", "body"))
+        return self._fresh(name, reply)
+
+    async def get_many(self, keys: Iterable[Tuple]) -> List[Optional[Any]]:
+        names = [self._key(key) for key in keys]
+        if not names:
+            return []
+        replies = await self._execute(*(("HMGET", name, "meta", "body") for name in names))
+        return [self._fresh(name, reply) for name, reply in zip(names, replies)]
+
+    async def get_stale(self, key: Tuple) -> Optional[CacheEntry]:
+        name = self._key(key)
+        ((meta, body),) = await self._execute(("HMGET", name, "meta", "body"))
+        if meta is None or body is None:
+            return None
+        return self._load(name, json.loads(meta), body)
+
+    async def set(
+        self,
+        key: Tuple,
+        data: Any,
+        *,
+        ttl: Optional[float] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        await self._execute(*self._set_commands(key, data, ttl, etag, last_modified))
+
+    async def set_many(self, items: Mapping[Tuple, Any], *, ttl: Optional[float] = None):
+        commands = []
+        for key, data in items.items():
+            commands.extend(self._set_commands(key, data, ttl))
+        if commands:
+            await self._execute(*commands)
+
+    async def touch(self, key: Tuple):
+        name = self._key(key)
+        (meta,) = await self._execute(("HGET", name, "meta"))
+        if meta is None:
+            return
+        meta = json.loads(meta)
+        meta, expires = self._meta(
+            time.time(),
+            meta["ttl"],
+            meta.get("not_found"),
+            meta.get("etag"),
+            meta.get("last_modified"),
+        )
+        await self._execute(("HSET", name, "meta", meta), ("PEXPIRE", name, expires))
+
+    async def delete(self, key: Tuple):
+        name = self._key(key)
+        self._decoded.pop(name, None)
+        await self._execute(("DEL", name))
+
+    async def close(self):
+        """Closes the connection to the Redis server."""
+        async with self.lock:
+            writer = self._writer
+            self._disconnect()
+        if writer is not None:
+            await writer.wait_closed()
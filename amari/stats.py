@@ -0,0 +1,74 @@
+from collections import deque
+from typing import Deque, Optional
+
+__all__ = ("ClientStats",)
+
+
+class ClientStats:
+    """
+    Counters describing the requests made by an :class:`AmariClient`.
+
+    Attributes
+    ----------
+    requests: int
+        The number of HTTP requests sent, including hedged requests.
+    timeouts: int
+        The number of calls that failed with :exc:`DeadlineExceeded`.
+    hedged: int
+        The number of calls for which a hedged request was sent.
+    hedge_wins: int
+        The number of hedged requests that answered before the original request.
+    ratelimit_wait: float
+        The total time spent waiting for the anti ratelimit, in seconds.
+    """
+
+    __slots__ = ("requests", "timeouts", "hedged", "hedge_wins", "ratelimit_wait", "_latencies")
+
+    def __init__(self, samples: int = 512):
+        self.requests: int = 0
+        self.timeouts: int = 0
+        self.hedged: int = 0
+        self.hedge_wins: int = 0
+        self.ratelimit_wait: float = 0.0
+        self._latencies: Deque[float] = deque(maxlen=samples)
+
+    def __repr__(self) -> str:
+        return (
+            f"<ClientStats requests={self.requests} timeouts={self.timeouts} "
+            f"hedged={self.hedged} hedge_wins={self.hedge_wins}>"
+        )
+
+    @property
+    def samples(self) -> int:
+        """The number of latency samples kept."""
+        return len(self._latencies)
+
+    def record_latency(self, latency: float):
+        """
+        Records the latency of a completed request.
+
+        Parameters
+        ----------
+        latency: float
+            The request's latency, in seconds.
+        """
+        self._latencies.append(latency)
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        """
+        Get a percentile of the recent request latencies.
+
+        Parameters
+        ----------
+        percentile: float
+            The percentile, between 0 and 1.
+
+        Returns
+        -------
+        Optional[float]
+            The latency in seconds, or ``None`` if no request completed yet.
+        """
+        if not self._latencies:
+            return None
+        latencies = sorted(self._latencies)
+        return latencies[min(int(percentile * len(latencies)), len(latencies) - 1)]
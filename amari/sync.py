@@ -0,0 +1,164 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, List, Optional
+
+from .api import AmariClient
+from .objects import CombinedLeaderboard, Leaderboard, Rewards, User, Users
+
+__all__ = ("SyncAmariClient",)
+
+
+class SyncAmariClient:
+    """
+    A blocking client for synchronous code, such as web dashboards or task workers.
+
+    The client owns a background thread running an event loop and a single long-lived
+    :class:`AmariClient`, so every call shares one connection pool, cache and ratelimit.
+    It is safe to use from many threads at once.
+
+    Parameters are the same as :class:`AmariClient`.
+
+    Attributes
+    ----------
+    client: AmariClient
+        The asynchronous client running on the background event loop.
+    """
+
+    def __init__(self, token: str, /, **kwargs: Any):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="amari-client", daemon=True)
+        self._thread.start()
+        self._close_lock = threading.Lock()
+        self._closed = False
+
+        try:
+            self.client: AmariClient = self._run(self._create_client(token, kwargs)).result()
+        except BaseException:
+            self._closed = True
+            self._stop_loop()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    @staticmethod
+    async def _create_client(token: str, kwargs: dict) -> AmariClient:
+        # The client must be created on the background loop so its session is bound to it.
+        return AmariClient(token, **kwargs)
+
+    def _run(self, coro) -> concurrent.futures.Future:
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def submit(self, method: str, /, *args: Any, **kwargs: Any) -> concurrent.futures.Future:
+        """
+        Schedules a call to an :class:`AmariClient` method without waiting for it.
+
+        Parameters
+        ----------
+        method: str
+            The name of the client method, for example ``"fetch_leaderboard"``.
+        *args: Any
+            The positional arguments passed to the method.
+        **kwargs: Any
+            The keyword arguments passed to the method.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            A future resolving to the method's result.
+        """
+        if self._closed:
+            raise RuntimeError("the client is closed")
+        return self._run(getattr(self.client, method)(*args, **kwargs))
+
+    def close(self):
+        """
+        Closes the client and stops the background event loop.
+
+        This must be called once the client is no longer in use.
+        """
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+
+        try:
+            self._run(self.client.close()).result()
+        finally:
+            self._stop_loop()
+
+    def _stop_loop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def fetch_user(self, guild_id: int, user_id: int, cache: bool = False) -> User:
+        """Blocking version of :meth:`AmariClient.fetch_user`."""
+        return self.submit("fetch_user", guild_id, user_id, cache=cache).result()
+
+    def fetch_users(
+        self, guild_id: int, user_ids: List[int], cache: bool = False, frozen: bool = False
+    ) -> Users:
+        """Blocking version of :meth:`AmariClient.fetch_users`."""
+        return self.submit("fetch_users", guild_id, user_ids, cache=cache, frozen=frozen).result()
+
+    def fetch_leaderboard(
+        self,
+        guild_id: int,
+        /,
+        *,
+        weekly: bool = False,
+        raw: bool = False,
+        page: Optional[int] = None,
+        limit: Optional[int] = None,
+        cache: bool = False,
+        frozen: bool = False,
+    ) -> Leaderboard:
+        """Blocking version of :meth:`AmariClient.fetch_leaderboard`."""
+        return self.submit(
+            "fetch_leaderboard",
+            guild_id,
+            weekly=weekly,
+            raw=raw,
+            page=page,
+            limit=limit,
+            cache=cache,
+            frozen=frozen,
+        ).result()
+
+    def fetch_full_leaderboard(
+        self, guild_id: int, /, *, weekly: bool = False, cache: bool = False, frozen: bool = False
+    ) -> Leaderboard:
+        """Blocking version of :meth:`AmariClient.fetch_full_leaderboard`."""
+        return self.submit(
+            "fetch_full_leaderboard", guild_id, weekly=weekly, cache=cache, frozen=frozen
+        ).result()
+
+    def fetch_combined_leaderboard(
+        self, guild_id: int, /, *, cache: bool = False
+    ) -> CombinedLeaderboard:
+        """Blocking version of :meth:`AmariClient.fetch_combined_leaderboard`."""
+        return self.submit("fetch_combined_leaderboard", guild_id, cache=cache).result()
+
+    def fetch_rewards(
+        self,
+        guild_id: int,
+        /,
+        *,
+        page: int = 1,
+        limit: int = 50,
+        cache: bool = False,
+        frozen: bool = False,
+    ) -> Rewards:
+        """Blocking version of :meth:`AmariClient.fetch_rewards`."""
+        return self.submit(
+            "fetch_rewards", guild_id, page=page, limit=limit, cache=cache, frozen=frozen
+        ).result()
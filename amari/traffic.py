@@ -0,0 +1,461 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import gzip
+import json
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Mapping, Optional
+
+from .warmer import _refreshing
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+    from .api import AmariClient
+    from .stats import ClientStats
+
+__all__ = ("TrafficRecorder", "ReplayReport", "MockAmariServer", "replay")
+
+VERSION = 1
+
+
+class _Call:
+    __slots__ = ("outcome",)
+
+    def __init__(self):
+        self.outcome: Optional[str] = None
+
+
+# The client call being recorded, whose cache outcome is set by the cache layer.
+_current_call: contextvars.ContextVar[Optional[_Call]] = contextvars.ContextVar(
+    "_current_call", default=None
+)
+
+
+def _set_outcome(outcome: str):
+    call = _current_call.get()
+    if call is not None:
+        call.outcome = outcome
+
+
+def _active_recorder(client: AmariClient) -> Optional[TrafficRecorder]:
+    # Calls made by a recorded call or by the cache warmer are not recorded themselves.
+    if _current_call.get() is not None or _refreshing.get() is not None:
+        return None
+    return client.recorder
+
+
+def _recorded(method):
+    # Records calls to a public client method while a recorder is set.
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        recorder = _active_recorder(self)
+        if recorder is None:
+            return await method(self, *args, **kwargs)
+
+        call = _Call()
+        token = _current_call.set(call)
+        start = time.perf_counter()
+        error = None
+        try:
+            return await method(self, *args, **kwargs)
+        except Exception as exc:
+            error = type(exc).__name__
+            raise
+        finally:
+            _current_call.reset(token)
+            outcome = call.outcome or ("miss" if kwargs.get("cache") else "uncached")
+            recorder.record(
+                method.__name__, args, kwargs, outcome, time.perf_counter() - start, error
+            )
+
+    return wrapper
+
+
+def _percentile(values: List[float], percentile: float) -> Optional[float]:
+    if not values:
+        return None
+    return values[min(int(percentile * len(values)), len(values) - 1)]
+
+
+class TrafficRecorder:
+    """
+    Records the calls made to an :class:`AmariClient`, to replay them later.
+
+    Each call to a fetch method is recorded with its time, arguments, cache outcome,
+    latency and error type. Tokens, headers and response bodies are never recorded.
+    Pass it to the client as ``recorder``.
+
+    Cache outcomes are ``"hit"``, ``"miss"``, ``"revalidated"`` when an expired entry was
+    kept after a 304 response, ``"shared"`` when the call waited for an identical
+    request already in flight, and ``"uncached"`` when caching was not used.
+
+    Attributes
+    ----------
+    path: Optional[str]
+        The gzip compressed JSON lines file calls are written to. When ``None``, calls are
+        only kept in :attr:`calls`.
+    calls: List[list]
+        The calls recorded, when no path is given, as
+        ``[offset, method, args, kwargs, outcome, latency, error]`` lists.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.calls: List[list] = []
+        self._start = time.perf_counter()
+        self._file = None
+        if path is not None:
+            self._file = gzip.open(path, "wt", encoding="utf-8")
+            self._file.write(json.dumps({"version": VERSION, "started": time.time()}) + "\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def record(
+        self,
+        method: str,
+        args: tuple,
+        kwargs: Mapping[str, Any],
+        outcome: str,
+        latency: float,
+        error: Optional[str] = None,
+    ):
+        """
+        Records one call.
+
+        Parameters
+        ----------
+        method: str
+            The name of the client method.
+        args: tuple
+            The positional arguments of the call.
+        kwargs: Mapping[str, Any]
+            The keyword arguments of the call.
+        outcome: str
+            The cache outcome of the call.
+        latency: float
+            How long the call took, in seconds.
+        error: Optional[str]
+            The name of the exception raised by the call, if any.
+        """
+        offset = round(time.perf_counter() - self._start - latency, 4)
+        call = [offset, method, list(args), dict(kwargs), outcome, round(latency, 5), error]
+        if self._file is None:
+            self.calls.append(call)
+        else:
+            self._file.write(json.dumps(call, separators=(",", ":")) + "\n")
+
+    def close(self):
+        """Closes the recording file, if any."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @staticmethod
+    def load(path: str) -> List[list]:
+        """
+        Reads the calls of a recording file.
+
+        Parameters
+        ----------
+        path: str
+            The recording file.
+
+        Returns
+        -------
+        List[list]
+            The recorded calls, in the order they started.
+        """
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            header = json.loads(file.readline())
+            if header.get("version") != VERSION:
+                raise ValueError(f"unsupported recording version {header.get('version')!r}")
+            calls = [json.loads(line) for line in file]
+        calls.sort(key=lambda call: call[0])
+        return calls
+
+
+class ReplayReport:
+    """
+    The results of replaying a recording with one client configuration.
+
+    Attributes
+    ----------
+    config: Dict[str, Any]
+        The keyword arguments the client was created with.
+    calls: int
+        The number of calls replayed.
+    errors: int
+        The number of calls that raised an exception.
+    duration: float
+        How long the replay took, in seconds.
+    requests: int
+        The number of HTTP requests sent.
+    ratelimit_wait: float
+        The total time spent waiting for the anti ratelimit, in seconds.
+    hit_ratio: Optional[float]
+        The fraction of cached calls answered without a full request, or ``None`` if
+        no call used caching.
+    latencies: Dict[str, Optional[float]]
+        The ``"p50"``, ``"p95"`` and ``"p99"`` call latencies, in seconds.
+    """
+
+    __slots__ = (
+        "config",
+        "calls",
+        "errors",
+        "duration",
+        "requests",
+        "ratelimit_wait",
+        "hit_ratio",
+        "latencies",
+    )
+
+    def __init__(
+        self, config: Dict[str, Any], calls: List[list], duration: float, stats: ClientStats
+    ):
+        self.config = config
+        self.calls = len(calls)
+        self.errors = sum(call[6] is not None for call in calls)
+        self.duration = duration
+        self.requests: int = stats.requests
+        self.ratelimit_wait: float = stats.ratelimit_wait
+
+        cached = [call[4] for call in calls if call[4] != "uncached"]
+        hits = sum(outcome in ("hit", "shared", "revalidated") for outcome in cached)
+        self.hit_ratio = hits / len(cached) if cached else None
+
+        latencies = sorted(call[5] for call in calls)
+        self.latencies = {
+            "p50": _percentile(latencies, 0.5),
+            "p95": _percentile(latencies, 0.95),
+            "p99": _percentile(latencies, 0.99),
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"<ReplayReport calls={self.calls} throughput={self.throughput:.1f}/s "
+            f"hit_ratio={self.hit_ratio} ratelimit_wait={self.ratelimit_wait:.2f}s>"
+        )
+
+    @property
+    def throughput(self) -> float:
+        """The number of calls completed per second."""
+        return self.calls / self.duration if self.duration else 0.0
+
+
+class MockAmariServer:
+    """
+    A local stand-in for the Amari API, serving generated guilds to replayed traffic.
+
+    Every guild has the same generated members, and any member ID is found.
+
+    Attributes
+    ----------
+    members: int
+        The number of members in each guild's leaderboard.
+    latency: float
+        The time taken to answer each request, in seconds.
+    url: Optional[str]
+        The base URL of the server, once started.
+    """
+
+    def __init__(self, *, members: int = 1000, latency: float = 0.0):
+        self.members = members
+        self.latency = latency
+        self.url: Optional[str] = None
+        self._runner = None
+        self._rows = [
+            {
+                "id": str(i + 1),
+                "username": f"user{i}",
+                "exp": str((members - i) * 100),
+                "level": (members - i) // 10,
+                "weeklyExp": str((i * 37) % members),
+            }
+            for i in range(members)
+        ]
+
+    async def __aenter__(self) -> MockAmariServer:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    def _app(self) -> web.Application:
+        from aiohttp import web
+
+        rows = self._rows
+
+        def handler(handle):
+            async def wrapper(request: web.Request) -> web.Response:
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                return web.json_response(await handle(request))
+
+            return wrapper
+
+        async def leaderboard(request: web.Request) -> dict:
+            page = int(request.query.get("page", 1))
+            limit = int(request.query.get("limit", 50))
+            data = rows[(page - 1) * limit : page * limit]
+            return {"count": len(data), "total_count": len(rows), "data": data}
+
+        async def raw_leaderboard(request: web.Request) -> dict:
+            return {"count": len(rows), "data": rows}
+
+        def member_data(user_id: str) -> dict:
+            return {"id": user_id, "username": f"user{user_id}", "exp": "100", "level": 1}
+
+        async def member(request: web.Request) -> dict:
+            return member_data(request.match_info["user_id"])
+
+        async def members(request: web.Request) -> dict:
+            requested = (await request.json())["members"]
+            found = [member_data(user_id) for user_id in requested]
+            return {"members": found, "total_members": len(found), "queried_members": len(found)}
+
+        async def rewards(request: web.Request) -> dict:
+            roles = [{"roleID": str(i), "level": i * 5} for i in range(1, 11)]
+            return {"count": len(roles), "data": roles}
+
+        app = web.Application()
+        app.router.add_get("/api/v1/guild/leaderboard/{guild_id}", handler(leaderboard))
+        app.router.add_get("/api/v1/guild/weekly/{guild_id}", handler(leaderboard))
+        app.router.add_get("/api/v1/guild/raw/leaderboard/{guild_id}", handler(raw_leaderboard))
+        app.router.add_get("/api/v1/guild/raw/weekly/{guild_id}", handler(raw_leaderboard))
+        app.router.add_get("/api/v1/guild/{guild_id}/member/{user_id}", handler(member))
+        app.router.add_post("/api/v1/guild/{guild_id}/members", handler(members))
+        app.router.add_get("/api/v1/guild/rewards/{guild_id}", handler(rewards))
+        return app
+
+    async def start(self) -> str:
+        """
+        Starts the server on a free local port.
+
+        Returns
+        -------
+        str
+            The base URL to set as :attr:`AmariClient.BASE_URL`.
+        """
+        from aiohttp import web
+
+        self._runner = web.AppRunner(self._app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", 0).start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}/api/v1/"
+        return self.url
+
+    async def close(self):
+        """Stops the server."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def _replay_once(
+    calls: List[list], config: Dict[str, Any], url: str, speed: float
+) -> ReplayReport:
+    from .api import AmariClient
+
+    recorder = TrafficRecorder()
+    client = AmariClient("replay", recorder=recorder, **config)
+    client.BASE_URL = url
+    # Time based settings are scaled, so accelerated replays keep the same
+    # ratelimit and expiry behaviour as the recorded traffic.
+    client.request_period /= speed
+    client.not_found_ttl /= speed
+    # A cache_backend from the config belongs to the caller, so the cache TTLs are
+    # restored once the replay ends rather than compounding across replays.
+    cache = client.cache
+    ttls = {name: getattr(cache, name) for name in ("ttl", "stale_ttl") if hasattr(cache, name)}
+    for name, value in ttls.items():
+        setattr(cache, name, value / speed)
+
+    async def run(call: list):
+        _, method, args, kwargs = call[:4]
+        try:
+            await getattr(client, method)(*args, **kwargs)
+        except Exception:
+            pass  # Errors are counted from the recorder.
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    tasks = []
+    try:
+        for call in calls:
+            delay = start + call[0] / speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(run(call)))
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await client.close()
+        for name, value in ttls.items():
+            setattr(cache, name, value)
+    return ReplayReport(config, recorder.calls, loop.time() - start, client.stats)
+
+
+async def replay(
+    path: str,
+    configs: Iterable[Mapping[str, Any]] = ({},),
+    /,
+    *,
+    speed: float = 1.0,
+    server: Optional[MockAmariServer] = None,
+) -> List[ReplayReport]:
+    """
+    Replays a recording against a local mock server, once for each client configuration.
+
+    Calls are started at their recorded times, divided by ``speed``.
+
+    .. code:: py
+
+        reports = await amari.replay(
+            "traffic.jsonl.gz",
+            [{"max_requests": 55}, {"max_requests": 55, "cache_ttl": 300}],
+            speed=10,
+        )
+        for report in reports:
+            print(report.config, report.throughput, report.hit_ratio, report.latencies)
+
+    Parameters
+    ----------
+    path: str
+        The file written by a :class:`TrafficRecorder`.
+    configs: Iterable[Mapping[str, Any]]
+        The keyword arguments of the :class:`AmariClient` for each replay, such as
+        ``max_requests``, ``cache_ttl`` or ``maxbytes``.
+    speed: float
+        How many times faster than recorded to replay the calls. The client's ratelimit
+        period and cache TTLs are scaled by the same factor.
+    server: Optional[MockAmariServer]
+        The server to replay against. A default :class:`MockAmariServer` is used when
+        not given.
+
+    Returns
+    -------
+    List[ReplayReport]
+        The report of each configuration, in order.
+    """
+    calls = TrafficRecorder.load(path)
+    owned = server is None
+    if owned:
+        server = MockAmariServer()
+    if server.url is None:
+        await server.start()
+    try:
+        return [await _replay_once(calls, dict(config), server.url, speed) for config in configs]
+    finally:
+        if owned:
+            await server.close()
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .api import AmariClient
+
+__all__ = ("CacheWarmer",)
+
+logger = logging.getLogger(__name__)
+
+# Set while a target is refreshed: cached reads are skipped, and the keys that were
+# refreshed are collected in the list.
+_refreshing: contextvars.ContextVar[Optional[List[Tuple]]] = contextvars.ContextVar(
+    "_refreshing", default=None
+)
+
+ENDPOINTS = ("fetch_user", "fetch_leaderboard", "fetch_full_leaderboard", "fetch_rewards")
+
+
+class _Target:
+    __slots__ = ("endpoint", "guild_id", "params", "keys", "refreshed_at")
+
+    def __init__(self, endpoint: str, guild_id: int, params: Dict[str, Any]):
+        self.endpoint = endpoint
+        self.guild_id = guild_id
+        self.params = params
+        self.keys: List[Tuple] = []
+        self.refreshed_at = 0.0
+
+
+class CacheWarmer:
+    """
+    Refreshes registered cache entries before they expire.
+
+    Refreshes are spaced out rather than sent in bursts, targets read most since
+    their last refresh go first, and the warmer backs off while little of the
+    ratelimit budget is left, so user requests are not delayed by it.
+
+    It is available as :attr:`AmariClient.warmer`.
+
+    Attributes
+    ----------
+    client: AmariClient
+        The client whose cache is kept warm.
+    refresh_ratio: float
+        The fraction of the cache TTL after which an entry is refreshed.
+    min_budget: float
+        The fraction of :attr:`AmariClient.max_requests` that must be left for a refresh
+        to be made.
+    min_hits: int
+        Targets read fewer times than this since their last refresh are not refreshed.
+    spacing: Optional[float]
+        The minimum time between two refreshes, in seconds. By default refreshes are spread
+        evenly over the part of the TTL left after ``refresh_ratio``.
+    max_backoff: float
+        The longest time to wait while the ratelimit budget is low, in seconds.
+    """
+
+    def __init__(
+        self,
+        client: AmariClient,
+        *,
+        refresh_ratio: float = 0.8,
+        min_budget: float = 0.2,
+        min_hits: int = 0,
+        spacing: Optional[float] = None,
+        max_backoff: float = 30,
+    ):
+        self.client = client
+        self.refresh_ratio = refresh_ratio
+        self.min_budget = min_budget
+        self.min_hits = min_hits
+        self.spacing = spacing
+        self.max_backoff = max_backoff
+
+        self._targets: Dict[Tuple, _Target] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @staticmethod
+    def _target_id(endpoint: str, guild_id: int, params: Dict[str, Any]) -> Tuple:
+        return (endpoint, guild_id, tuple(sorted(params.items())))
+
+    def register(self, endpoint: str, guild_id: int, /, **params: Any):
+        """
+        Registers a target to keep warm.
+
+        Parameters
+        ----------
+        endpoint: str
+            The client method, either ``"fetch_user"``, ``"fetch_leaderboard"``,
+            ``"fetch_full_leaderboard"`` or ``"fetch_rewards"``.
+        guild_id: int
+            The guild ID passed to the method.
+        **params: Any
+            The other arguments passed to the method, for example ``weekly=True``.
+        """
+        if endpoint not in ENDPOINTS:
+            raise ValueError(f"cannot warm {endpoint!r}, expected one of {ENDPOINTS}")
+        target_id = self._target_id(endpoint, guild_id, params)
+        if target_id not in self._targets:
+            self._targets[target_id] = _Target(endpoint, guild_id, params)
+            if self._wakeup is not None:
+                self._wakeup.set()
+
+    def unregister(self, endpoint: str, guild_id: int, /, **params: Any):
+        """
+        Stops keeping a target warm.
+
+        Parameters are the same as :meth:`register`.
+        """
+        self._targets.pop(self._target_id(endpoint, guild_id, params), None)
+
+    @property
+    def running(self) -> bool:
+        """Whether the warmer is running."""
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """
+        Starts refreshing the registered targets in the background.
+
+        This must be called from a running event loop.
+        """
+        if not self.running:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stops the warmer."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _hits(self, target: _Target) -> int:
+        return sum(self.client.cache.hits(key) for key in target.keys)
+
+    def _budget(self) -> float:
+        return self.client.remaining_requests() / self.client.max_requests
+
+    async def _refresh(self, target: _Target):
+        keys: List[Tuple] = []
+        token = _refreshing.set(keys)
+        try:
+            method = getattr(self.client, target.endpoint)
+            await method(target.guild_id, **target.params, cache=True)
+        finally:
+            _refreshing.reset(token)
+            target.refreshed_at = time.time()
+            if keys:
+                target.keys = keys
+
+    async def _run(self):
+        backoff = 0.0
+        while True:
+            ttl = self.client.cache.ttl
+            now = time.time()
+            targets = list(self._targets.values())
+            due = []
+            for target in targets:
+                if now - target.refreshed_at < ttl * self.refresh_ratio:
+                    continue
+                if target.keys and self._hits(target) < self.min_hits:
+                    # Cold targets are skipped for this period, until they are read again.
+                    target.refreshed_at = now
+                    continue
+                due.append(target)
+
+            if not due:
+                self._wakeup.clear()
+                # Sleep until the next target is due, or a new target is registered.
+                delays = [
+                    target.refreshed_at + ttl * self.refresh_ratio - now for target in targets
+                ]
+                timeout = max(min(delays), 0.1) if delays else None
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            if self.client.use_anti_ratelimit and self._budget() < self.min_budget:
+                backoff = min(max(backoff * 2, 1.0), self.max_backoff)
+                logger.debug(f"Ratelimit budget is low, pausing the cache warmer for {backoff}s.")
+                await asyncio.sleep(backoff)
+                continue
+            backoff = 0.0
+
+            target = max(due, key=self._hits)
+            try:
+                await self._refresh(target)
+            except Exception:
+                logger.exception(
+                    f"Failed to refresh {target.endpoint} for guild {target.guild_id}."
+                )
+
+            spacing = self.spacing
+            if spacing is None:
+                spacing = ttl * (1 - self.refresh_ratio) / max(len(targets), 1)
+            await asyncio.sleep(spacing)
@@ -0,0 +1,71 @@
+"""
+Measures how a dropped 100k-member leaderboard is freed.
+
+With weakly referenced parents, a leaderboard is freed by refcounting as soon as
+it is dropped, so the cyclic garbage collector has nothing left to find. When users
+hold strong references to their leaderboard, every dropped leaderboard stays in
+memory until a full collection walks all of its users.
+
+With the package installed, run ``python benchmarks/gc_leaderboard.py``.
+"""
+
+import gc
+import time
+import tracemalloc
+
+from amari import Leaderboard
+
+MEMBERS = 100_000
+POLLS = 5
+
+
+def make_data(count: int) -> dict:
+    members = [
+        {
+            "id": str(10**17 + i),
+            "username": f"user{i}",
+            "exp": (count - i) * 100,
+            "level": (count - i) // 1000,
+            "weeklyExp": i % 5000,
+        }
+        for i in range(count)
+    ]
+    return {"count": count, "data": members}
+
+
+def main():
+    data = make_data(MEMBERS)
+    gc.collect()
+    gc.disable()
+    tracemalloc.start()
+
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        for _ in range(POLLS):
+            # Simulates steady polling, where each new leaderboard replaces the previous one.
+            board = Leaderboard(1, data)
+            del board
+        elapsed = time.perf_counter() - start
+        retained, peak = tracemalloc.get_traced_memory()
+
+        start = time.perf_counter()
+        unreachable = gc.collect()
+        collect_time = time.perf_counter() - start
+        collected, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        gc.enable()
+
+    print(f"members per leaderboard:        {MEMBERS}")
+    print(f"polls:                          {POLLS}")
+    print(f"build and drop time:            {elapsed * 1000:.1f} ms")
+    print(f"peak memory:                    {(peak - baseline) / 2**20:.1f} MiB")
+    print(f"retained after drop (no gc):    {(retained - baseline) / 2**20:.1f} MiB")
+    print(f"objects found by gc.collect():  {unreachable}")
+    print(f"gc.collect() time:              {collect_time * 1000:.1f} ms")
+    print(f"retained after gc.collect():    {(collected - baseline) / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Measures how long importing the package takes in a fresh interpreter.
+
+Public names are imported lazily, so importing the package or the objects alone
+does not load aiohttp. With the package installed, run
+``python benchmarks/import_time.py``. ``python -X importtime -c "import amari"``
+gives a per-module breakdown.
+"""
+
+import statistics
+import subprocess
+import sys
+
+RUNS = 15
+
+STATEMENTS = (
+    "import amari",
+    "from amari import Leaderboard",
+    "from amari import AmariClient",
+    "from amari import AmariClient; AmariClient('token')",
+)
+
+SCRIPT = """
+import sys, time
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start, "aiohttp" in sys.modules)
+"""
+
+
+def measure(statement: str):
+    times = []
+    for _ in range(RUNS):
+        output = subprocess.run(
+            [sys.executable, "-c", SCRIPT.format(statement=statement)],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.split()
+        times.append(float(output[0]))
+    return statistics.median(times), output[1] == "True"
+
+
+def main():
+    print(f"median of {RUNS} fresh interpreters")
+    for statement in STATEMENTS:
+        elapsed, loaded = measure(statement)
+        print(f"{statement:55} {elapsed * 1000:7.2f} ms  aiohttp loaded: {loaded}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Replays a recording made with ``amari.TrafficRecorder`` against a local mock server,
+once per client configuration, and prints a report for each.
+
+With the package installed, run
+``python benchmarks/replay.py traffic.jsonl.gz --speed 10 max_requests=55 cache_ttl=300``.
+Each argument after the path is one configuration, as comma separated ``key=value``
+pairs of AmariClient keyword arguments. With no configuration, the defaults are replayed.
+"""
+
+import argparse
+import asyncio
+import json
+
+import amari
+
+
+def parse_config(text: str) -> dict:
+    config = {}
+    for item in text.split(","):
+        key, _, value = item.partition("=")
+        config[key] = json.loads(value)
+    return config
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path")
+    parser.add_argument("configs", nargs="*", type=parse_config)
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--members", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_intermixed_args()
+
+    server = amari.MockAmariServer(members=args.members, latency=args.latency)
+    async with server:
+        reports = await amari.replay(
+            args.path, args.configs or [{}], speed=args.speed, server=server
+        )
+
+    for report in reports:
+        latencies = "  ".join(
+            f"{name} {value * 1000:7.2f} ms" for name, value in report.latencies.items()
+        )
+        hit_ratio = "n/a" if report.hit_ratio is None else f"{report.hit_ratio:.1%}"
+        print(report.config or "defaults")
+        print(
+            f"  {report.throughput:8.1f} calls/s  {report.requests} requests  "
+            f"ratelimit wait {report.ratelimit_wait:.2f} s  hit ratio {hit_ratio}  "
+            f"{report.errors} errors"
+        )
+        print(f"  {latencies}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,222 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import Counter, deque
+
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from amari import AmariClient
+
+GUILD_ID = 346474194394939393
+MEMBER_COUNT = 250
+
+
+def make_members(count: int = MEMBER_COUNT) -> list:
+    return [
+        {
+            "id": str(1000 + i),
+            "username": f"user{i}",
+            "exp": str((count - i) * 100),
+            "level": (count - i) // 10,
+            "weeklyExp": str((i * 37) % count),
+        }
+        for i in range(count)
+    ]
+
+
+class MockState:
+    def __init__(self):
+        self.hits = Counter()
+        self.members = make_members()
+        # Members of the weekly leaderboards, when they differ from the regular ones.
+        self.weekly_members = None
+        self.not_modified = 0
+        self.compressed = 0
+        # Delays, in seconds, applied to the next leaderboard requests.
+        self.delays = deque()
+
+
+def make_app(state: MockState) -> web.Application:
+    """Builds a small stand-in for the Amari API."""
+    app = web.Application()
+
+    def record(request: web.Request) -> None:
+        state.hits[request.path] += 1
+
+    def respond(request: web.Request, payload: dict) -> web.Response:
+        # Supports ETag revalidation and gzip, like the real API's CDN.
+        body = json.dumps(payload).encode()
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if request.headers.get("If-None-Match") == etag:
+            state.not_modified += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        response = web.Response(body=body, content_type="application/json", headers={"ETag": etag})
+        if "gzip" in request.headers.get("Accept-Encoding", ""):
+            state.compressed += 1
+            response.enable_compression(web.ContentCoding.gzip)
+        return response
+
+    def board_members(request: web.Request) -> list:
+        if "weekly" in request.path and state.weekly_members is not None:
+            return state.weekly_members
+        return state.members
+
+    def guild_or_404(request: web.Request) -> None:
+        if int(request.match_info["guild_id"]) != GUILD_ID:
+            raise web.HTTPNotFound(
+                text='{"error": "Unknown Guild"}', content_type="application/json"
+            )
+
+    async def leaderboard(request: web.Request) -> web.Response:
+        record(request)
+        guild_or_404(request)
+        if state.delays:
+            await asyncio.sleep(state.delays.popleft())
+        members = board_members(request)
+        page = int(request.query.get("page", 1))
+        limit = int(request.query.get("limit", 50))
+        data = members[(page - 1) * limit : page * limit]
+        return respond(request, {"count": len(data), "total_count": len(members), "data": data})
+
+    async def raw_leaderboard(request: web.Request) -> web.Response:
+        record(request)
+        guild_or_404(request)
+        members = board_members(request)
+        return respond(request, {"count": len(members), "data": members})
+
+    async def member(request: web.Request) -> web.Response:
+        record(request)
+        guild_or_404(request)
+        user_id = request.match_info["user_id"]
+        for data in state.members:
+            if data["id"] == user_id:
+                return web.json_response(data)
+        return web.json_response({"error": "Unknown Member"}, status=404)
+
+    async def members(request: web.Request) -> web.Response:
+        record(request)
+        guild_or_404(request)
+        requested = set((await request.json())["members"])
+        found = [data for data in state.members if data["id"] in requested]
+        return web.json_response(
+            {"members": found, "total_members": len(found), "queried_members": len(requested)}
+        )
+
+    async def rewards(request: web.Request) -> web.Response:
+        record(request)
+        guild_or_404(request)
+        roles = [{"roleID": str(5000 + i), "level": i * 5} for i in range(1, 11)]
+        return respond(request, {"count": len(roles), "data": roles})
+
+    app.router.add_get("/api/v1/guild/leaderboard/{guild_id}", leaderboard)
+    app.router.add_get("/api/v1/guild/weekly/{guild_id}", leaderboard)
+    app.router.add_get("/api/v1/guild/raw/leaderboard/{guild_id}", raw_leaderboard)
+    app.router.add_get("/api/v1/guild/raw/weekly/{guild_id}", raw_leaderboard)
+    app.router.add_get("/api/v1/guild/{guild_id}/member/{user_id}", member)
+    app.router.add_post("/api/v1/guild/{guild_id}/members", members)
+    app.router.add_get("/api/v1/guild/rewards/{guild_id}", rewards)
+    return app
+
+
+@pytest_asyncio.fixture
+async def server():
+    state = MockState()
+    server = TestServer(make_app(state))
+    server.state = state
+    await server.start_server()
+    try:
+        yield server
+    finally:
+        await server.close()
+
+
+@pytest_asyncio.fixture
+async def make_client(server):
+    clients = []
+
+    def factory(**kwargs) -> AmariClient:
+        client = AmariClient("token", **kwargs)
+        client.BASE_URL = str(server.make_url("/api/v1/"))
+        clients.append(client)
+        return client
+
+    try:
+        yield factory
+    finally:
+        for client in clients:
+            await client.close()
+
+
+class MockRedis:
+    """A small stand-in for a Redis server, supporting the commands used by RedisCache."""
+
+    def __init__(self):
+        self.data = {}
+        self.commands = Counter()
+
+    def get(self, key: bytes):
+        value, expires = self.data.get(key, (None, None))
+        if expires is not None and time.time() >= expires:
+            del self.data[key]
+            return None
+        return value
+
+    def execute(self, command: list) -> bytes:
+        name = command[0].upper().decode()
+        self.commands[name] += 1
+        if name in ("SELECT", "AUTH"):
+            return b"-ERR unsupported\r\n"
+        if name == "HSET":
+            fields = self.get(command[1]) or {}
+            fields.update(zip(command[2::2], command[3::2]))
+            self.data[command[1]] = (fields, self.data.get(command[1], (None, None))[1])
+            return b":%d\r\n" % (len(command[2:]) // 2)
+        if name in ("HGET", "HMGET"):
+            fields = self.get(command[1]) or {}
+            values = [fields.get(field) for field in command[2:]]
+            if name == "HGET":
+                return encode_reply(values[0])
+            return b"*%d\r\n" % len(values) + b"".join(map(encode_reply, values))
+        if name == "PEXPIRE":
+            if self.get(command[1]) is None:
+                return b":0\r\n"
+            self.data[command[1]] = (
+                self.data[command[1]][0],
+                time.time() + int(command[2]) / 1000,
+            )
+            return b":1\r\n"
+        if name == "DEL":
+            return b":%d\r\n" % sum(self.data.pop(key, None) is not None for key in command[1:])
+        return b"-ERR unknown command '%s'\r\n" % command[0]
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while line := await reader.readline():
+                command = []
+                for _ in range(int(line[1:])):
+                    length = int((await reader.readline())[1:])
+                    command.append((await reader.readexactly(length + 2))[:-2])
+                writer.write(self.execute(command))
+        finally:
+            writer.close()
+
+
+def encode_reply(value) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+@pytest_asyncio.fixture
+async def redis_server():
+    redis = MockRedis()
+    server = await asyncio.start_server(redis.handle, "127.0.0.1", 0)
+    redis.port = server.sockets[0].getsockname()[1]
+    try:
+        yield redis
+    finally:
+        server.close()
+        await server.wait_closed()
@@ -0,0 +1,444 @@
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import aiohttp
+import pytest
+from conftest import GUILD_ID
+
+import amari.offload
+from amari import (
+    AmariClient,
+    Cache,
+    CacheError,
+    ClientStats,
+    DeadlineExceeded,
+    FrozenLeaderboard,
+    FrozenUsers,
+    NotFound,
+    PayloadOffloader,
+    RawLeaderboardPolicy,
+    RedisCache,
+)
+
+
+@pytest.mark.asyncio
+async def test_pages_sliced_from_raw_leaderboard(server, make_client):
+    """Tests that paginated requests are served from a cached raw leaderboard"""
+    client = make_client(leaderboard_policy=RawLeaderboardPolicy(page_threshold=2))
+
+    first = await client.fetch_leaderboard(GUILD_ID, page=1, limit=50, cache=True)
+    second = await client.fetch_leaderboard(GUILD_ID, page=2, limit=50, cache=True)
+    third = await client.fetch_leaderboard(GUILD_ID, page=1, limit=100, cache=True)
+
+    hits = server.state.hits
+    assert hits["/api/v1/guild/leaderboard/%d" % GUILD_ID] == 1
+    assert hits["/api/v1/guild/raw/leaderboard/%d" % GUILD_ID] == 1
+    assert len(first) == 50 and len(second) == 50 and len(third) == 100
+    assert [user.user_id for user in second] == list(range(1050, 1100))
+    assert second.total_count == 250
+
+
+@pytest.mark.asyncio
+async def test_policy_respects_max_members(server, make_client):
+    """Tests that large leaderboards keep being fetched page by page"""
+    client = make_client(
+        leaderboard_policy=RawLeaderboardPolicy(page_threshold=1, max_members=100)
+    )
+
+    for page in range(1, 4):
+        await client.fetch_leaderboard(GUILD_ID, page=page, limit=50, cache=True)
+
+    hits = server.state.hits
+    assert hits["/api/v1/guild/leaderboard/%d" % GUILD_ID] == 3
+    assert hits["/api/v1/guild/raw/leaderboard/%d" % GUILD_ID] == 0
+
+
+@pytest.mark.asyncio
+async def test_page_requests_are_pruned(server, make_client):
+    """Tests that concurrent raw fetches succeed and idle leaderboards are forgotten"""
+    client = make_client(cache_ttl=0.1, leaderboard_policy=RawLeaderboardPolicy(page_threshold=1))
+
+    pages = await asyncio.gather(
+        *(client.fetch_leaderboard(GUILD_ID, page=page, limit=10, cache=True) for page in (1, 2))
+    )
+    assert [len(page) for page in pages] == [10, 10] and not client._page_requests
+
+    client.leaderboard_policy.page_threshold = 2
+    await client.fetch_leaderboard(GUILD_ID, weekly=True, limit=10, cache=True)
+    await asyncio.sleep(0.15)
+    await client.fetch_leaderboard(GUILD_ID, limit=10, cache=True)
+    assert list(client._page_requests) == [(GUILD_ID, False)]
+    assert list(client._total_counts) == [(GUILD_ID, True), (GUILD_ID, False)]
+
+
+@pytest.mark.asyncio
+async def test_not_found_is_cached(server, make_client):
+    """Tests that concurrent and later callers share one cached NotFound"""
+    client = make_client()
+
+    results = await asyncio.gather(
+        *(client.fetch_user(GUILD_ID, 42, cache=True) for _ in range(5)),
+        return_exceptions=True,
+    )
+    assert all(isinstance(result, NotFound) for result in results)
+    with pytest.raises(NotFound):
+        await client.fetch_user(GUILD_ID, 42, cache=True)
+
+    assert server.state.hits["/api/v1/guild/%d/member/42" % GUILD_ID] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_request(server, make_client):
+    """Tests that waiters still get data when the caller that started the request is cancelled"""
+    client = make_client()
+    server.state.delays.append(0.2)
+
+    owner = asyncio.ensure_future(client.fetch_leaderboard(GUILD_ID, cache=True))
+    await asyncio.sleep(0.05)
+    waiter = asyncio.ensure_future(client.fetch_leaderboard(GUILD_ID, cache=True))
+    await asyncio.sleep(0.05)
+    owner.cancel()
+
+    assert len(await waiter) == 50
+    assert owner.cancelled() and not waiter.cancelled()
+    assert server.state.hits["/api/v1/guild/leaderboard/%d" % GUILD_ID] == 1
+
+
+@pytest.mark.asyncio
+async def test_fetch_users_remembers_missing_members(server, make_client):
+    """Tests that members missing from a members response are not requested again"""
+    client = make_client()
+
+    users = await client.fetch_users(GUILD_ID, [1000, 42], cache=True)
+    assert list(users.users) == [1000]
+    users = await client.fetch_users(GUILD_ID, [1000, 42], cache=True)
+    assert list(users.users) == [1000]
+    with pytest.raises(NotFound):
+        await client.fetch_user(GUILD_ID, 42, cache=True)
+
+    assert server.state.hits["/api/v1/guild/%d/members" % GUILD_ID] == 1
+    assert server.state.hits["/api/v1/guild/%d/member/42" % GUILD_ID] == 0
+
+
+@pytest.mark.asyncio
+async def test_cache_batch_operations():
+    """Tests that batch cache operations expire entries and count hits like single ones"""
+    cache = Cache(ttl=60)
+    await cache.set_many({("a",): {"id": "1"}, ("b",): {"id": "2"}})
+    await cache.set_many({("c",): NotFound(None)}, ttl=0)
+
+    values = await cache.get_many([("a",), ("c",), ("d",), ("a",)])
+    assert values == [{"id": "1"}, None, None, {"id": "1"}]
+    assert cache.hits(("a",)) == 2 and ("c",) not in cache.cache
+    assert cache.total_size == sum(entry.size for entry in cache.cache.values())
+
+
+@pytest.mark.asyncio
+async def test_offloaded_parsing(server, make_client, monkeypatch):
+    """Tests that large payloads are decoded and built off the event loop"""
+    threads, submitted = [], []
+
+    def build(cls, guild_id, data):  # A local function cannot be sent to a process.
+        threads.append(threading.current_thread())
+        return cls(guild_id, data)
+
+    class Pool(ProcessPoolExecutor):
+        def submit(self, fn, /, *args, **kwargs):
+            submitted.append(fn.__name__)
+            return super().submit(fn, *args, **kwargs)
+
+    monkeypatch.setattr(amari.offload, "_build", build)
+    with Pool(max_workers=1) as executor:
+        offloader = PayloadOffloader(executor, threshold=1024, row_threshold=100)
+        client = make_client(offloader=offloader)
+
+        board = await client.fetch_full_leaderboard(GUILD_ID)
+        cached = await client.fetch_full_leaderboard(GUILD_ID, cache=True)
+        small = await client.fetch_leaderboard(GUILD_ID, limit=10)
+
+    # Uncached boards are decoded and built in the pool, cached ones are only decoded
+    # there and built in a thread.
+    assert submitted == ["_load", "_decode"]
+    assert [thread is threading.main_thread() for thread in threads] == [False, True]
+    assert len(board) == len(cached) == 250 and len(small) == 10
+    user = board.get_user(1001)
+    assert (user.name, user.exp, user.position, user.leaderboard) == ("user1", 24900, 1, board)
+
+
+@pytest.mark.asyncio
+async def test_frozen_snapshots_are_shared(server, make_client):
+    """Tests that frozen leaderboards of the same cached data are shared"""
+    client = make_client()
+
+    boards = await asyncio.gather(
+        *(client.fetch_full_leaderboard(GUILD_ID, cache=True, frozen=True) for _ in range(3))
+    )
+    again = await client.fetch_full_leaderboard(GUILD_ID, cache=True, frozen=True)
+
+    assert isinstance(again, FrozenLeaderboard)
+    assert all(board is again for board in boards)
+
+
+def test_client_creates_session_lazily():
+    """Tests that creating a client outside an event loop does not create a session"""
+    client = AmariClient("token")
+    assert client._session is None
+    asyncio.run(client.close())
+
+
+def test_client_closes_sessions_of_finished_loops():
+    """Tests that a client reused across event loops closes the sessions it replaces"""
+    client = AmariClient("token")
+
+    async def get_session():
+        return client.session
+
+    sessions = [asyncio.run(get_session()) for _ in range(2)]
+    asyncio.run(client.close())
+
+    assert sessions[0] is not sessions[1]
+    assert all(session.closed for session in sessions)
+
+    # Loops that are still open, but no longer running.
+    loops = [asyncio.new_event_loop() for _ in range(2)]
+    try:
+        sessions = [loop.run_until_complete(get_session()) for loop in loops]
+        loops[1].run_until_complete(client.close())
+    finally:
+        for loop in loops:
+            loop.close()
+
+    assert all(session.closed for session in sessions)
+
+
+@pytest.mark.asyncio
+async def test_warmer_refreshes_before_expiry(server, make_client):
+    """Tests that registered targets are refreshed before their cache entries expire"""
+    client = make_client(cache_ttl=1)
+    client.warmer.spacing = 0.01
+    client.warmer.register("fetch_full_leaderboard", GUILD_ID, weekly=True)
+    client.warmer.register("fetch_rewards", GUILD_ID)
+    client.warmer.start()
+
+    await asyncio.sleep(0.1)
+    path = "/api/v1/guild/raw/weekly/%d" % GUILD_ID
+    assert server.state.hits[path] == 1
+
+    for _ in range(12):
+        await client.fetch_full_leaderboard(GUILD_ID, weekly=True, cache=True)
+        await client.fetch_rewards(GUILD_ID, cache=True)
+        await asyncio.sleep(0.1)
+    await client.warmer.stop()
+
+    # Every user call was a cache hit, while the warmer refreshed in the background.
+    assert server.state.hits[path] == 2
+    assert server.state.hits["/api/v1/guild/rewards/%d" % GUILD_ID] == 2
+
+
+@pytest.mark.asyncio
+async def test_bulk_fetch_reports_errors_per_guild(server, make_client):
+    """Tests that bulk fetches dedupe guilds, use the cache and keep per-guild errors"""
+    client = make_client()
+    await client.fetch_rewards(GUILD_ID, cache=True)
+
+    results = [result async for result in client.bulk_fetch_rewards([GUILD_ID, 1, GUILD_ID, 2])]
+    boards = [result async for result in client.bulk_fetch_leaderboards([GUILD_ID, 1], limit=10)]
+
+    assert [result.guild_id for result in results] == [GUILD_ID, 1, 2]
+    assert results[0].ok and len(results[0].result) == 10
+    assert all(isinstance(result.error, NotFound) for result in results[1:])
+    assert server.state.hits["/api/v1/guild/rewards/%d" % GUILD_ID] == 1
+    assert {result.guild_id: result.ok for result in boards} == {GUILD_ID: True, 1: False}
+
+
+@pytest.mark.asyncio
+async def test_expired_entries_are_revalidated(server, make_client):
+    """Tests that expired entries are revalidated with their ETag"""
+    client = make_client()
+    client.cache.ttl = 0.05
+
+    first = await client.fetch_full_leaderboard(GUILD_ID, cache=True, frozen=True)
+    await asyncio.sleep(0.1)
+    second = await client.fetch_full_leaderboard(GUILD_ID, cache=True, frozen=True)
+    assert server.state.not_modified == 1
+    assert second is first
+
+    server.state.members = server.state.members[:10]
+    await asyncio.sleep(0.1)
+    third = await client.fetch_full_leaderboard(GUILD_ID, cache=True)
+    assert server.state.not_modified == 1 and len(third) == 10
+    assert server.state.compressed == 2
+
+
+@pytest.mark.asyncio
+async def test_deadline_exceeded(server, make_client):
+    """Tests that slow requests fail once their deadline passes"""
+    client = make_client(timeout=0.1)
+    server.state.delays.append(1)
+
+    with pytest.raises(DeadlineExceeded):
+        await client.fetch_leaderboard(GUILD_ID)
+    with pytest.raises(DeadlineExceeded):
+        with client.deadline(0):
+            await client.fetch_leaderboard(GUILD_ID)
+
+    assert len(await client.fetch_leaderboard(GUILD_ID)) == 50
+    assert client.stats.timeouts == 2
+
+
+@pytest.mark.asyncio
+async def test_deadline_of_one_caller_is_not_shared(server, make_client):
+    """Tests that a caller's deadline does not fail the other callers of a shared request"""
+    client = make_client()
+    server.state.delays.append(0.3)
+
+    async def with_deadline():
+        with client.deadline(0.1):
+            return await client.fetch_leaderboard(GUILD_ID, cache=True)
+
+    first, second = await asyncio.gather(
+        with_deadline(), client.fetch_leaderboard(GUILD_ID, cache=True), return_exceptions=True
+    )
+
+    assert isinstance(first, DeadlineExceeded) and len(second) == 50
+    assert client.stats.timeouts == 1 and client.stats.requests == 1
+
+
+@pytest.mark.asyncio
+async def test_session_timeouts_are_not_deadlines(server, make_client):
+    """Tests that timeouts of the session are not reported as exceeded deadlines"""
+    session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=0.1))
+    client = make_client(session=session)
+    server.state.delays.append(1)
+    try:
+        with pytest.raises(asyncio.TimeoutError):
+            await client.fetch_leaderboard(GUILD_ID)
+    finally:
+        await session.close()
+
+    assert client.stats.timeouts == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_hedged_request_is_not_orphaned(server, make_client, monkeypatch):
+    """Tests that cancelling a caller during the hedge delay cancels its request"""
+    client = make_client(hedge_percentile=0.9)
+    for _ in range(20):
+        await client.fetch_leaderboard(GUILD_ID)
+    monkeypatch.setattr(ClientStats, "latency_percentile", lambda self, percentile: 10)
+
+    server.state.delays.append(1)
+    task = asyncio.ensure_future(client.fetch_leaderboard(GUILD_ID))
+    await asyncio.sleep(0.05)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await asyncio.sleep(0)
+
+    attempts = [
+        other
+        for other in asyncio.all_tasks()
+        if other.get_coro().__qualname__ == "AmariClient._attempt"
+    ]
+    assert attempts == []
+
+
+@pytest.mark.asyncio
+async def test_slow_requests_are_hedged(server, make_client):
+    """Tests that a request slower than the latency percentile is sent again"""
+    client = make_client(hedge_percentile=0.9)
+    for _ in range(20):
+        await client.fetch_leaderboard(GUILD_ID)
+
+    server.state.delays.append(1)
+    leaderboard = await asyncio.wait_for(client.fetch_leaderboard(GUILD_ID), 0.5)
+
+    assert len(leaderboard) == 50
+    assert client.stats.hedged == client.stats.hedge_wins == 1
+    assert client.stats.requests == 22
+
+
+@pytest.mark.asyncio
+async def test_redis_cache_is_shared(server, make_client, redis_server):
+    """Tests that clients with a Redis cache share entries"""
+    caches = [RedisCache("127.0.0.1", redis_server.port, ttl=0.1) for _ in range(2)]
+    first, second = (make_client(cache_backend=cache) for cache in caches)
+    try:
+        leaderboard = await first.fetch_full_leaderboard(GUILD_ID, cache=True)
+        assert len(await second.fetch_full_leaderboard(GUILD_ID, cache=True)) == len(leaderboard)
+        with pytest.raises(NotFound):
+            await first.fetch_rewards(1, cache=True)
+        with pytest.raises(NotFound):
+            await second.fetch_rewards(1, cache=True)
+        assert sum(server.state.hits.values()) == 2
+
+        key = b"amari:fetch_full_leaderboard:%d:False" % GUILD_ID
+        body = redis_server.data[key][0][b"body"]
+        await asyncio.sleep(0.15)
+        await second.fetch_full_leaderboard(GUILD_ID, cache=True)
+        assert server.state.not_modified == 1
+        # Revalidation only rewrote the entry's metadata.
+        assert redis_server.data[key][0][b"body"] is body
+        assert await caches[0].get(("fetch_full_leaderboard", GUILD_ID, False)) is not None
+
+        await caches[0].set_many({("a",): 1, ("b",): NotFound(None)}, ttl=10)
+        values = await caches[1].get_many([("a",), ("b",), ("c",)])
+        assert values[0] == 1 and isinstance(values[1], NotFound) and values[2] is None
+    finally:
+        for cache in caches:
+            await cache.close()
+
+
+@pytest.mark.asyncio
+async def test_combined_leaderboard(server, make_client):
+    """Tests that both leaderboards are aligned into one index and shared from the cache"""
+    client = make_client()
+    combined = await client.fetch_combined_leaderboard(GUILD_ID, cache=True)
+    weekly = await client.fetch_full_leaderboard(GUILD_ID, weekly=True, cache=True)
+
+    assert await client.fetch_combined_leaderboard(GUILD_ID, cache=True) is combined
+    assert server.state.hits["/api/v1/guild/raw/weekly/%d" % GUILD_ID] == 1
+    assert len(combined) == len(weekly) == 250
+
+    user = combined.get_user(1010)
+    assert (user.exp, user.position) == (24000, 10)
+    assert user.weeklyexp == weekly.get_user(1010).weeklyexp
+    assert user.weekly_position == weekly.get_user(1010).position
+    assert [user.user_id for user in combined.top(3)] == [1000, 1001, 1002]
+    assert [user.position for user in combined.sorted_by()] == list(range(250))
+
+
+@pytest.mark.asyncio
+async def test_redis_cache_shares_snapshots(server, make_client, redis_server):
+    """Tests that frozen snapshots are shared while a Redis entry is unchanged"""
+    cache = RedisCache("127.0.0.1", redis_server.port)
+    client = make_client(cache_backend=cache)
+    try:
+        board = await client.fetch_full_leaderboard(GUILD_ID, cache=True, frozen=True)
+        again = await client.fetch_full_leaderboard(GUILD_ID, cache=True, frozen=True)
+        combined = await client.fetch_combined_leaderboard(GUILD_ID, cache=True)
+        assert again is board
+        assert await client.fetch_combined_leaderboard(GUILD_ID, cache=True) is combined
+
+        await cache.set(("fetch_full_leaderboard", GUILD_ID, False), {"count": 0, "data": []})
+        changed = await client.fetch_full_leaderboard(GUILD_ID, cache=True, frozen=True)
+        assert changed is not board and len(changed) == 0
+
+        users = await client.fetch_users(GUILD_ID, [1000, 1001], cache=True, frozen=True)
+        assert isinstance(users, FrozenUsers) and len(users) == 2
+    finally:
+        await cache.close()
+
+
+@pytest.mark.asyncio
+async def test_redis_cache_drops_failed_connections(redis_server):
+    """Tests that a connection whose SELECT failed is not reused"""
+    cache = RedisCache("127.0.0.1", redis_server.port, db=3)
+    try:
+        for _ in range(2):
+            with pytest.raises(CacheError):
+                await cache.set(("a",), 1)
+        assert redis_server.commands["SELECT"] == 2 and not redis_server.data
+    finally:
+        await cache.close()
@@ -0,0 +1,43 @@
+import os
+
+import pytest
+from conftest import GUILD_ID
+
+from amari import export_leaderboard, export_leaderboards, load_leaderboard
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("extension", [".ndjson", ".csv"])
+async def test_export_round_trip(server, make_client, tmp_path, extension):
+    """Tests that an exported leaderboard reloads with the same users"""
+    client = make_client()
+    path = str(tmp_path / f"board{extension}")
+
+    written = await export_leaderboard(client, GUILD_ID, path, page_size=100)
+    board = load_leaderboard(path, GUILD_ID)
+    expected = await client.fetch_full_leaderboard(GUILD_ID)
+
+    assert written == len(board) == 250
+    assert server.state.hits["/api/v1/guild/leaderboard/%d" % GUILD_ID] == 3
+    for user in expected:
+        loaded = board.get_user(user.user_id)
+        assert (loaded.name, loaded.exp, loaded.level, loaded.weeklyexp, loaded.position) == (
+            user.name,
+            user.exp,
+            user.level,
+            user.weeklyexp,
+            user.position,
+        )
+
+
+@pytest.mark.asyncio
+async def test_export_many_reports_errors_per_guild(server, make_client, tmp_path):
+    """Tests that one failing guild does not stop the other exports"""
+    client = make_client()
+
+    results = await export_leaderboards(client, [GUILD_ID, 1, GUILD_ID], str(tmp_path))
+
+    assert results[GUILD_ID] == 250
+    assert isinstance(results[1], Exception)
+    assert len(load_leaderboard(str(tmp_path / f"{GUILD_ID}.ndjson"), GUILD_ID)) == 250
+    assert sorted(os.listdir(tmp_path)) == [f"{GUILD_ID}.ndjson"]
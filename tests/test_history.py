@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+from conftest import GUILD_ID
+
+from amari import ExpHistory
+
+
+def rows(*exps: int) -> list:
+    return [{"id": str(i), "exp": str(exp), "weeklyExp": "0"} for i, exp in enumerate(exps)]
+
+
+def test_history_queries(tmp_path):
+    """Tests range, gain, rate and top gainer queries, and that they survive a reload"""
+    path = str(tmp_path / "history.bin")
+    with ExpHistory(path, min_interval=0) as history:
+        history.record(1, rows(100, 50), timestamp=1000)
+        history.record(1, rows(150, 50, 10), timestamp=2000)
+        assert history.record(1, rows(400, 60, 5_000_000_000), timestamp=3800)
+
+    with open(path, "ab") as file:
+        file.write(b"\x01\x02\x03")  # An interrupted write.
+
+    with ExpHistory(path) as history:
+        assert history.samples(1, 0) == [(1000, 100), (2000, 150), (3800, 400)]
+        assert history.samples(1, 0, 1500, 3000) == [(2000, 150)]
+        assert history.gain(1, 0, 1500) == 300
+        assert history.gain(1, 2, 0, 2500) == 0
+        assert history.gain(1, 1, 5000) == 0 and history.gain(1, 9, 0) is None
+        assert history.rate(1, 0, 1000, 2000) == 180
+        assert history.top_gainers(1, 1000, limit=2) == [(2, 4_999_999_990), (0, 300)]
+        assert not history.record(1, rows(500), timestamp=3810)
+
+
+def test_history_clamps_backwards_clock():
+    """Tests that a snapshot older than the previous one is moved forward instead of failing"""
+    history = ExpHistory(min_interval=0)
+    history.record(1, rows(100), timestamp=2000)
+    assert history.record(1, rows(150), timestamp=1000)
+    assert history.samples(1, 0) == [(2000, 100), (2000, 150)]
+
+
+@pytest.mark.asyncio
+async def test_client_records_leaderboards(server, make_client, monkeypatch):
+    """Tests that only full leaderboards are recorded, once per interval, off the loop"""
+    threads = set()
+    add = ExpHistory._add
+
+    def recording_add(self, *args):
+        threads.add(threading.current_thread())
+        add(self, *args)
+
+    monkeypatch.setattr(ExpHistory, "_add", recording_add)
+    history = ExpHistory()
+    client = make_client(history=history)
+
+    await client.fetch_leaderboard(GUILD_ID, page=1, limit=10)
+    await client.fetch_leaderboard(GUILD_ID, cache=True)
+    history.flush()
+    assert history.samples(GUILD_ID, 0) == []
+    await client.fetch_full_leaderboard(GUILD_ID, cache=True)
+    history.flush()
+    assert len(history.samples(GUILD_ID, 1249)) == 1
+    server.state.members[0]["exp"] = "99999"
+    history.min_interval = 0
+    await client.fetch_leaderboard(GUILD_ID, limit=10, raw=True)
+    await client.fetch_leaderboard(GUILD_ID, raw=True)
+    history.flush()
+
+    assert len(threads) == 1 and threading.main_thread() not in threads
+    assert len(history.samples(GUILD_ID, 1000)) == 2
+    assert history.top_gainers(GUILD_ID, 0, limit=1) == [(1000, 99999 - 25000)]
+
+
+@pytest.mark.asyncio
+async def test_client_does_not_record_weekly_leaderboards(server, make_client):
+    """Tests that weekly leaderboards, whose exp is the weekly exp, are not recorded"""
+    server.state.weekly_members = [
+        {"id": row["id"], "username": row["username"], "exp": row["weeklyExp"]}
+        for row in server.state.members
+    ]
+    history = ExpHistory(min_interval=0)
+    client = make_client(history=history)
+
+    await client.fetch_full_leaderboard(GUILD_ID, weekly=True)
+    await client.fetch_full_leaderboard(GUILD_ID, weekly=True, cache=True)
+    await client.fetch_leaderboard(GUILD_ID, weekly=True, raw=True)
+    await client.fetch_full_leaderboard(GUILD_ID)
+    history.flush()
+
+    assert [exp for _, exp in history.samples(GUILD_ID, 1001)] == [24900]
+    assert [exp for _, exp in history.samples(GUILD_ID, 1001, weekly=True)] == [37]
@@ -0,0 +1,23 @@
+import importlib
+import subprocess
+import sys
+
+import amari
+
+
+def test_import_does_not_load_aiohttp():
+    """Tests that importing the package and its objects does not load aiohttp"""
+    code = "import sys, amari; from amari import Leaderboard; print('aiohttp' in sys.modules)"
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    ).stdout
+    assert output.strip() == "False"
+
+
+def test_lazy_names_match_submodules():
+    """Tests that every public name of the submodules is lazily importable"""
+    names = set()
+    for module in amari._SUBMODULES:
+        names.update(importlib.import_module(f"amari.{module}").__all__)
+    assert names == set(amari.__all__)
+    assert all(getattr(amari, name) for name in amari.__all__)
@@ -0,0 +1,70 @@
+import gc
+import pickle
+import weakref
+
+import pytest
+from conftest import make_members
+
+from amari import CombinedLeaderboard, FrozenLeaderboard, Leaderboard, Rewards
+
+REWARDS = {"count": 2, "data": [{"roleID": "1", "level": 5}, {"roleID": "2", "level": 10}]}
+
+
+def test_collections_are_freed_without_gc():
+    """Tests that dropped leaderboards and rewards are freed by refcounting"""
+    gc.disable()
+    try:
+        board = Leaderboard(1, {"count": 250, "data": make_members()})
+        rewards = Rewards(1, REWARDS)
+        user = board.get_user(1000)
+        role = rewards.get_role(1)
+        assert user.leaderboard is board and role.rewards is rewards
+
+        refs = (weakref.ref(board), weakref.ref(rewards))
+        del board, rewards
+        assert all(ref() is None for ref in refs)
+        assert user.leaderboard is None and role.rewards is None
+    finally:
+        gc.enable()
+
+
+def test_collections_pickle():
+    """Tests that collections keep their back-references through pickling"""
+    board = pickle.loads(pickle.dumps(Leaderboard(1, {"count": 250, "data": make_members()})))
+    rewards = pickle.loads(pickle.dumps(Rewards(1, REWARDS)))
+
+    assert len(board.users) == 250 and board.get_user(1000).leaderboard is board
+    assert rewards.get_role(2).level == 10 and rewards.get_role(2).rewards is rewards
+    assert pickle.loads(pickle.dumps(board.get_user(1000))).exp == 25000
+
+
+def test_frozen_leaderboard_views():
+    """Tests the sorted views and slicing of frozen leaderboards"""
+    board = FrozenLeaderboard(1, {"count": 250, "data": make_members()})
+
+    assert [user.user_id for user in board[:3]] == [1000, 1001, 1002]
+    assert board.sorted_by("weeklyexp") is board.sorted_by("weeklyexp")
+    assert [user.weeklyexp for user in board.top(2, by="weeklyexp")] == [249, 248]
+    with pytest.raises(TypeError):
+        board.add_user(board[0])
+    with pytest.raises(TypeError):
+        board.users[1] = board[0]
+
+
+def test_combined_leaderboard_alignment():
+    """Tests that weekly positions and weekly-only users are aligned to the regular board"""
+    members = make_members(10)
+    weekly = [dict(member, weeklyExp=str(100 * i)) for i, member in enumerate(members[5:])]
+    weekly.reverse()
+    weekly.append({"id": "42", "username": "new", "exp": "50", "weeklyExp": "50"})
+    combined = CombinedLeaderboard(1, {"data": members}, {"data": weekly})
+    combined = pickle.loads(pickle.dumps(combined))
+
+    assert len(combined) == 11 and 42 in combined and 1000 in combined
+    user = combined.get_user(1009)
+    assert (user.position, user.weekly_position, user.weeklyexp) == (9, 0, 400)
+    assert combined.get_user(1000).weekly_position is None
+    new = combined.get_user(42)
+    assert (new.position, new.weekly_position, new.exp) == (None, 5, 50)
+    assert [user.user_id for user in combined.top(2, weekly=True)] == [1009, 1008]
+    assert [user.user_id for user in combined.sorted_by(weekly=True)][-1] == 42
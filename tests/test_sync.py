@@ -0,0 +1,33 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from conftest import GUILD_ID
+
+from amari import SyncAmariClient
+
+
+@pytest.mark.asyncio
+async def test_sync_client_shares_cache_across_threads(server):
+    """Tests that blocking calls from many threads share one client and cache"""
+    client = await asyncio.to_thread(SyncAmariClient, "token")
+    client.client.BASE_URL = str(server.make_url("/api/v1/"))
+
+    def fetch():
+        return client.fetch_full_leaderboard(GUILD_ID, cache=True)
+
+    # Callers get their own threads, as the mock server compresses in the default executor.
+    loop = asyncio.get_running_loop()
+    try:
+        with ThreadPoolExecutor(8) as executor:
+            boards = await asyncio.gather(
+                *(loop.run_in_executor(executor, fetch) for _ in range(8))
+            )
+        future = client.submit("fetch_rewards", GUILD_ID, cache=True)
+        rewards = await asyncio.wrap_future(future)
+    finally:
+        await asyncio.to_thread(client.close)
+
+    assert all(len(board) == 250 for board in boards)
+    assert len(rewards) == 10
+    assert server.state.hits["/api/v1/guild/raw/leaderboard/%d" % GUILD_ID] == 1
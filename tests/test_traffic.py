@@ -0,0 +1,78 @@
+import asyncio
+import gzip
+
+import pytest
+from conftest import GUILD_ID
+
+from amari import Cache, MockAmariServer, NotFound, TrafficRecorder, replay
+
+
+@pytest.mark.asyncio
+async def test_record_and_replay(server, make_client, tmp_path):
+    """Tests that recorded calls are replayed with each client configuration"""
+    path = str(tmp_path / "traffic.jsonl.gz")
+    with TrafficRecorder(path) as recorder:
+        client = make_client(recorder=recorder)
+        await client.fetch_leaderboard(GUILD_ID, cache=True)
+        await asyncio.sleep(0.05)  # Keeps the calls apart when replayed.
+        await client.fetch_leaderboard(GUILD_ID, cache=True)
+        await client.fetch_users(GUILD_ID, [1000, 1001], cache=True)
+        await client.fetch_rewards(GUILD_ID)
+        with pytest.raises(NotFound):
+            await client.fetch_user(GUILD_ID, 42, cache=True)
+
+    calls = TrafficRecorder.load(path)
+    assert [call[4] for call in calls] == ["miss", "hit", "miss", "uncached", "miss"]
+    assert calls[4][6] == "NotFound"
+    with gzip.open(path, "rb") as file:
+        assert b"token" not in file.read()
+
+    async with MockAmariServer(members=100) as mock:
+        reports = await replay(path, [{}, {"cache_ttl": 0}], server=mock)
+
+    assert [report.calls for report in reports] == [5, 5]
+    assert reports[0].hit_ratio == 0.25 and reports[1].hit_ratio == 0
+    assert reports[0].requests == 4 and reports[1].requests == 5
+    assert reports[0].errors == 0 and reports[0].latencies["p50"] is not None
+
+
+@pytest.mark.asyncio
+async def test_replay_leaves_cache_backend_unscaled(server, make_client, tmp_path):
+    """Tests that accelerated replays do not change the TTLs of a configured cache"""
+    path = str(tmp_path / "traffic.jsonl.gz")
+    with TrafficRecorder(path) as recorder:
+        client = make_client(recorder=recorder)
+        await client.fetch_rewards(GUILD_ID, cache=True)
+
+    cache = Cache(ttl=10, stale_ttl=300)
+    async with MockAmariServer() as mock:
+        await replay(path, [{"cache_backend": cache}] * 2, speed=10, server=mock)
+        await replay(path, [{"cache_backend": cache}], speed=10, server=mock)
+
+    assert cache.ttl == 10 and cache.stale_ttl == 300
+
+
+@pytest.mark.asyncio
+async def test_recorder_skips_warmer_and_records_bulk_hits(server, make_client):
+    """Tests that warmer refreshes are not recorded and bulk cache hits are"""
+    recorder = TrafficRecorder()
+    client = make_client(recorder=recorder)
+    client.warmer.spacing = 0.01
+    client.warmer.register("fetch_rewards", GUILD_ID)
+    client.warmer.start()
+    await asyncio.sleep(0.05)
+    await client.warmer.stop()
+    assert recorder.calls == []
+
+    await client.fetch_full_leaderboard(GUILD_ID, cache=True)
+    with pytest.raises(NotFound):
+        await client.fetch_full_leaderboard(1, cache=True)
+    results = [result async for result in client.bulk_fetch_leaderboards([GUILD_ID, 1, 2])]
+
+    assert len(results) == 3
+    calls = [(call[1], call[2], call[4], call[6]) for call in recorder.calls]
+    assert calls[2:] == [
+        ("fetch_full_leaderboard", [GUILD_ID], "hit", None),
+        ("fetch_full_leaderboard", [1], "hit", "NotFound"),
+        ("fetch_full_leaderboard", [2], "miss", "NotFound"),
+    ]